@@ -3,49 +3,106 @@ import aiohttp
 from aiohttp import ClientSession
 from bs4 import BeautifulSoup
 import urllib.parse
+from robots import robots
+from frontier import UrlFrontier
+from transport import HostSlots, create_session
 
 class Sitemapper:
 
-    def __init__(self):
-        self.urls_crawled = set()
-        self.urls_queue = set()
+    def __init__(self, workers=10, per_host=4, frontier=None):
+        # Pass UrlFrontier('crawl.db') to crawl beyond RAM and resume after a kill
+        self.frontier = frontier if frontier is not None else UrlFrontier()
         self.max_urls = 100
+        self.workers = workers
+        self.host_limits = HostSlots(per_host, {})
 
     async def main(self, start_url, block_extensions=['.pdf'], max_urls=100):
+        async for _ in self.crawl(start_url, block_extensions, max_urls):
+            pass
+        return set(self.frontier.crawled())
+
+    async def crawl(self, start_url, block_extensions=['.pdf'], max_urls=100):
+        """
+        Crawl from start_url with a pool of long-lived workers and yield every
+        page as soon as it was fetched successfully.
+        """
         self.max_urls = max_urls
         scheme, netloc, path, params, query, fragment = urllib.parse.urlparse(start_url)
         fragments = (scheme, netloc, '', '', '', '')
         base_url = urllib.parse.urlunparse(fragments)
 
-        self.urls_queue.add(base_url)
-
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            while self.urls_queue and len(self.urls_crawled) < self.max_urls:
-                url = self.urls_queue.pop()
-                tasks.append(self.fetch(session, url, block_extensions))
-                if len(tasks) >= 10:  # Control concurrency level
-                    await asyncio.gather(*tasks)
-                    tasks = []
-
-            if tasks:
-                await asyncio.gather(*tasks)
-
-        return self.urls_crawled
+        # Only a small hot batch is held in memory, the rest stays in the frontier
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+        found = asyncio.Queue()
+        self.enqueue(base_url, 0)
+
+        async with create_session() as session:
+            workers = [
+                asyncio.create_task(self.worker(session, queue, found, block_extensions))
+                for _ in range(self.workers)
+            ]
+            feeder = asyncio.create_task(self.feed(queue, found))
+            try:
+                while True:
+                    url = await found.get()
+                    if url is None:
+                        break
+                    yield url
+            finally:
+                for task in workers + [feeder]:
+                    task.cancel()
+                await asyncio.gather(*workers, feeder, return_exceptions=True)
+                self.frontier.checkpoint()
+
+    def enqueue(self, url, depth):
+        # max_urls caps what gets queued, so nothing beyond it is ever fetched
+        if self.frontier.seen_count >= self.max_urls:
+            return
+        self.frontier.add(url, priority=depth)
+
+    async def feed(self, queue, found):
+        while True:
+            batch = self.frontier.pop(queue.maxsize)
+            if batch:
+                for item in batch:
+                    await queue.put(item)
+                continue
+            # Wait for everything handed out; workers may queue more meanwhile
+            await queue.join()
+            if not self.frontier.has_queued():
+                await found.put(None)
+                return
+
+    async def worker(self, session, queue, found, block_extensions):
+        while True:
+            url, depth = await queue.get()
+            try:
+                links = await self.fetch(session, url, block_extensions)
+                if links is None:
+                    self.frontier.failed(url)
+                    continue
+                self.frontier.done(url)
+                await found.put(url)
+                for link in links:
+                    self.enqueue(link, depth + 1)
+            finally:
+                queue.task_done()
 
     async def fetch(self, session: ClientSession, url: str, block_extensions: list):
-        print(f"Fetching: {url}")
-        try:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    body = await response.text()
-                    self.urls_crawled.add(url)
-                    links = self.extract_links(url, body, block_extensions)
-                    for link in links:
-                        if link not in self.urls_queue and link not in self.urls_crawled:
-                            self.urls_queue.add(link)
-        except aiohttp.ClientError as e:
-            print(f"Error fetching {url}: {e}")
+        if not await robots.can_fetch(session, url):
+            print(f"Disallowed by robots.txt: {url}")
+            return None
+        async with self.host_limits(url):
+            await robots.wait(session, url)
+            print(f"Fetching: {url}")
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        body = await response.text()
+                        return self.extract_links(url, body, block_extensions)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error fetching {url}: {e}")
+        return None
 
     def extract_links(self, url, body, block_extensions):
         soup = BeautifulSoup(body, 'html.parser')
@@ -67,10 +124,13 @@ class Sitemapper:
 
         return good_links
 
-     async def find_model_urls(self, start_url, keyword="model", block_extensions=['.pdf'], max_urls=100): 
-         crawled_urls = await self.main(start_url, block_extensions, max_urls) 
-         model_urls = [url for url in crawled_urls if keyword in url.lower()] 
-         return model_urls 
+    async def find_model_urls(self, start_url, keyword="model", block_extensions=['.pdf'], max_urls=100):
+        model_urls = []
+        async for url in self.crawl(start_url, block_extensions, max_urls):
+            if keyword in url.lower():
+                model_urls.append(url)
+        return model_urls
 
 # Example usage:
+# sitemapper = Sitemapper(workers=20)
 # asyncio.run(sitemapper.find_model_urls("https://example.com", keyword="model"))
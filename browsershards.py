@@ -0,0 +1,99 @@
+import os
+import sys
+import queue
+import importlib
+import multiprocessing
+import concurrent.futures
+from getbrowser import browser_alive, shutdown_browser
+from tabpool import TAB_POOL_SIZE
+
+# Browser processes a sharded scrape starts; 1 keeps everything in this process
+BROWSER_SHARDS = int(os.getenv('BROWSER_SHARDS', os.cpu_count() or 1))
+# Times one shard is started again after its browser died
+SHARD_RESTARTS = 2
+# Exit status of a shard that stopped because its browser is gone
+BROWSER_DIED = 3
+
+
+def _load(func_ref):
+    module, name = func_ref.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _run_shard(func_ref, work, results):
+    """
+    Child process: scrape (index, url) pairs on this process's own browser and
+    report (index, items) per page. Stops with BROWSER_DIED when a page fails
+    and the browser turns out to be gone, so the parent can restart the shard.
+    """
+    func = _load(func_ref)
+    died = False
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=TAB_POOL_SIZE)
+    futures = {executor.submit(func, url): index for index, url in work}
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            items = future.result()
+            if not items and not browser_alive():
+                died = True
+                break
+            results.put((futures[future], items))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        # atexit does not run in multiprocessing children
+        shutdown_browser()
+    if died:
+        sys.exit(BROWSER_DIED)
+
+
+def scrape_sharded(func_ref, urls, shards=None):
+    """
+    Run func(url) -> list of items over urls on `shards` browser processes
+    and return the per-URL results in url order.
+
+    func_ref is 'module:function' so it can be imported in the child. Each
+    child starts its own browser (auto_port keeps their debug ports apart)
+    and works through its share with one thread per pooled tab. A shard
+    whose process exits early is started again with the pages it had not
+    reported, up to SHARD_RESTARTS times.
+    """
+    shards = max(1, min(shards or BROWSER_SHARDS, len(urls)))
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    work = {k: [(i, url) for i, url in enumerate(urls) if i % shards == k] for k in range(shards)}
+    restarts = dict.fromkeys(work, 0)
+    collected = {}
+
+    def start(k):
+        process = ctx.Process(target=_run_shard, args=(func_ref, work[k], results), daemon=True)
+        process.start()
+        return process
+
+    def drain(block):
+        try:
+            while True:
+                index, items = results.get(timeout=1) if block else results.get_nowait()
+                collected[index] = items
+                block = False
+        except queue.Empty:
+            pass
+
+    running = {k: start(k) for k in work}
+    print(f"[INFO] Scraping {len(urls)} pages on {shards} browser shards")
+    while running:
+        drain(block=True)
+        for k, process in list(running.items()):
+            if process.is_alive():
+                continue
+            drain(block=False)
+            del running[k]
+            work[k] = [(i, url) for i, url in work[k] if i not in collected]
+            if not work[k]:
+                continue
+            if restarts[k] < SHARD_RESTARTS:
+                restarts[k] += 1
+                print(f"[WARNING] Shard {k} exited with {process.exitcode}, "
+                      f"restarting it for {len(work[k])} pages ({restarts[k]}/{SHARD_RESTARTS})")
+                running[k] = start(k)
+            else:
+                print(f"[ERROR] Shard {k} gave up with {len(work[k])} pages left")
+    return [collected.get(i, []) for i in range(len(urls))]
@@ -0,0 +1,105 @@
+import os
+import sys
+import asyncio
+import aiohttp
+from transport import create_session
+
+# Point at a local stand-in server with CIVITAI_API_BASE=http://127.0.0.1:8000/api/v1
+CIVITAI_API_BASE = os.getenv('CIVITAI_API_BASE', 'https://civitai.com/api/v1')
+CIVITAI_API_KEY = os.getenv('CIVITAI_API_KEY')
+# CIVITAI_API=1 takes download counts from the API instead of scraping every model page;
+# run counts then keep whatever the page scrape stored last
+USE_CIVITAI_API = os.getenv('CIVITAI_API', '') not in ('', '0')
+CIVITAI_SITE = 'https://civitai.com'
+# Largest page the models API hands out
+PAGE_LIMIT = 100
+# Cursors are sequential, so each model type is walked as its own chain of pages
+MODEL_TYPES = [
+    'Checkpoint', 'TextualInversion', 'Hypernetwork', 'AestheticGradient', 'LORA', 'LoCon', 'DoRA',
+    'Controlnet', 'Upscaler', 'MotionModule', 'VAE', 'Poses', 'Wildcards', 'Workflows', 'Detection', 'Other',
+]
+# civitai_model_data column -> key in a model's `stats`; generations are not in the
+# public API, so run_count stays None and the stored value is kept
+STAT_FIELDS = {'download_count': 'downloadCount', 'run_count': 'generationCount'}
+
+
+def model_url(model_id):
+    # The engine files this under the sitemap URL with the same id (providers.civitai_model_id)
+    return f"{CIVITAI_SITE}/models/{model_id}"
+
+
+async def iter_models(session, model_type=None, max_items=None, page_size=PAGE_LIMIT):
+    """Yield one model dict per entry, following metadata.nextPage until it runs out"""
+    headers = {'Authorization': f"Bearer {CIVITAI_API_KEY}"} if CIVITAI_API_KEY else None
+    url = f"{CIVITAI_API_BASE}/models"
+    params = [('limit', str(page_size)), ('sort', 'Most Downloaded'), ('nsfw', 'true')]
+    if model_type:
+        params.append(('types', model_type))
+    count = 0
+    while url:
+        async with session.get(url, params=params, headers=headers) as response:
+            response.raise_for_status()
+            page = await response.json()
+        for model in page.get('items', []):
+            yield model
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+        # nextPage already carries the cursor and every filter
+        url, params = page.get('metadata', {}).get('nextPage'), None
+
+
+async def _walk_type(session, model_type, max_items, out):
+    count = 0
+    try:
+        async for model in iter_models(session, model_type, max_items):
+            await out.put(model)
+            count += 1
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"[ERROR] Civitai {model_type} listing failed after {count} models: {e}")
+    print(f"[INFO] Civitai {model_type}: {count} models")
+
+
+async def iter_all_models(session, types=MODEL_TYPES, max_items=None):
+    """Walk every model type concurrently, yielding models as their pages arrive"""
+    out = asyncio.Queue(maxsize=PAGE_LIMIT * len(types))
+    done = object()
+
+    async def walk(model_type):
+        try:
+            await _walk_type(session, model_type, max_items, out)
+        finally:
+            await out.put(done)
+
+    walkers = [asyncio.create_task(walk(model_type)) for model_type in types]
+    remaining = len(walkers)
+    try:
+        while remaining:
+            model = await out.get()
+            if model is done:
+                remaining -= 1
+            else:
+                yield model
+    finally:
+        for walker in walkers:
+            walker.cancel()
+
+
+async def collect_stats(session):
+    """(model page url, [download_count, run_count]) for every public model"""
+    async for model in iter_all_models(session):
+        stats = model.get('stats') or {}
+        yield model_url(model['id']), [stats.get(key) for key in STAT_FIELDS.values()]
+
+
+async def main(max_items):
+    async with create_session() as session:
+        models = [m async for m in iter_all_models(session, max_items=max_items)]
+    print(f"[INFO] {len(models)} models")
+    for model in models[:5]:
+        print(f"    {model_url(model['id'])} {model.get('type')} {model.get('stats')}")
+
+
+if __name__ == "__main__":
+    # python civitaiapi.py [max models per type]
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
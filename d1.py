@@ -0,0 +1,38 @@
+import os
+import asyncio
+import aiohttp
+from transport import host_slots
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+D1_DATABASE_ID = os.getenv('CLOUDFLARE_D1_DATABASE_ID')
+CLOUDFLARE_ACCOUNT_ID = os.getenv('CLOUDFLARE_ACCOUNT_ID')
+CLOUDFLARE_API_TOKEN = os.getenv('CLOUDFLARE_API_TOKEN')
+
+CLOUDFLARE_BASE_URL = f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/d1/database/{D1_DATABASE_ID}"
+
+# D1 rejects statements with more bound parameters than this
+D1_MAX_PARAMS = 100
+
+HEADERS = {
+    "Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}",
+    "Content-Type": "application/json",
+}
+
+
+# Helper: Run one SQL statement against D1, returns the response JSON or None on failure
+async def d1_query(session, sql, params=None):
+    payload = {"sql": sql}
+    if params:
+        payload["params"] = params
+    url = f"{CLOUDFLARE_BASE_URL}/query"
+    try:
+        # D1 writes have their own budget and never wait behind page fetches
+        async with host_slots(url), session.post(url, headers=HEADERS, json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"[ERROR] D1 query failed: {e}")
+        return None
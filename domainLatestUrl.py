@@ -1,10 +1,11 @@
+import asyncio
 import requests
-from getbrowser import setup_chrome
+from tabpool import TabPool
+from serpcache import serp_cache, SERP_TTLS
+from resultsink import ResultSink
+from serpparse import parse_serp, game_name
 
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime, timedelta
-import time
 import re
 import os
 import logging
@@ -12,7 +13,47 @@ from urllib.parse import quote, urlparse, parse_qs
 import random
 import logging
 
-browser = setup_chrome()
+# Tabs on the shared browser, which starts with the first page scraped
+tabs = TabPool()
+
+# Pacing per search engine host: how many queries may page through it at once, and the
+# random pause (seconds) each of them takes between two of its result pages
+ENGINE_PACING = {
+    'www.google.com': {'concurrency': 2, 'delay': (2, 5)},
+}
+DEFAULT_PACING = {'concurrency': 2, 'delay': (2, 5)}
+
+
+def pacing_for(url):
+    return ENGINE_PACING.get(urlparse(url).netloc, DEFAULT_PACING)
+
+
+class EnginePacer:
+    """Per-engine query slots and awaitable pauses for the async scheduler"""
+
+    def __init__(self):
+        self.slots = {}
+
+    def slot(self, url):
+        host = urlparse(url).netloc
+        if host not in self.slots:
+            self.slots[host] = asyncio.Semaphore(pacing_for(url)['concurrency'])
+        return self.slots[host]
+
+    async def pause(self, url):
+        await asyncio.sleep(random.uniform(*pacing_for(url)['delay']))
+
+
+# How far back each time range reaches, narrowest first; 'all' has no limit
+RANGE_SPANS = {
+    '24h': timedelta(days=1),
+    '1w': timedelta(weeks=1),
+    '1m': timedelta(days=31),
+    '1y': timedelta(days=366),
+    'all': None,
+}
+# Set to a directory to keep the raw HTML of every results page loaded (python serpparse.py dir/*.html)
+SERP_SAVE_DIR = os.getenv('SERP_SAVE_DIR')
 
 class DomainMonitor:
     def __init__(self, sites_file="game_sites.txt"):
@@ -75,7 +116,7 @@ class DomainMonitor:
             
         elif  time_range=='all':
             print("default is all results")
-            pass
+            tbs = ''
         
         query = f'site:{site}'
         params = {
@@ -108,7 +149,7 @@ class DomainMonitor:
             
         elif  time_range=='all':
             print("default is all results")
-            pass
+            tbs = ''
 
         params = {
             'q': query,
@@ -126,32 +167,7 @@ class DomainMonitor:
         :param html_content: 页面HTML内容
         :return: 提取的URL和标题列表
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        results = []
-        
-        # 查找搜索结果
-        for result in soup.select('div.g'):
-            try:
-                title_elem = result.select_one('h3')
-                url_elem = result.select_one('a')
-                
-                if title_elem and url_elem:
-                    title = title_elem.get_text()
-                    url = url_elem['href']
-                    
-                    # 提取可能的游戏名称
-                    game_name = self.extract_game_name(title)
-                    
-                    # if game_name:
-                    results.append({
-                            'title': title,
-                            'url': url,
-                            'game_name': game_name
-                        })
-            except Exception as e:
-                self.logger.error(f"Error extracting result: {str(e)}")
-                
-        return results
+        return parse_serp(html_content)[1]
 
     def extract_game_name(self, title):
         """
@@ -159,22 +175,30 @@ class DomainMonitor:
         :param title: 页面标题
         :return: 提取的游戏名称或None
         """
-        # 这里可以根据具体网站的标题特征来优化游戏名称提取规则
-        patterns = [
-            r'《(.+?)》',  # 中文书名号
-            r'"(.+?)"',    # 英文引号
-            r'【(.+?)】',  # 中文方括号
-            r'\[(.+?)\]'   # 英文方括号
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, title)
-            if match:
-                return match.group(1)
-        
-        # 如果没有特定标记，返回清理后的标题
-        cleaned_title = re.sub(r'(攻略|评测|资讯|下载|官网|专区|合集|手游|网游|页游|主机游戏|单机游戏)', '', title)
-        return cleaned_title.strip()
+        return game_name(title)
+
+    def search_url(self, site, time_range, page, advanced_query=None):
+        start = page * 100  # Google default 100 results per page
+        if advanced_query:
+            return self.build_google_advanced_search_url(advanced_query, time_range, start)
+        return self.build_google_search_url(site, time_range, start)
+
+    def load_results_page(self, search_url, first_page):
+        """
+        Load one results page in a pooled tab and parse it
+        :return: (results, total result count or None); the count is only read on the first page
+        """
+        # Results pages reuse pooled tabs instead of leaving one open per page
+        with tabs.tab() as tab:
+            tab.get(search_url)
+            html=tab.html
+        if SERP_SAVE_DIR:
+            name = re.sub(r'[^\w.-]+', '_', search_url.split('?', 1)[-1])[:150]
+            with open(os.path.join(SERP_SAVE_DIR, name + '.html'), 'w', encoding='utf8') as f:
+                f.write(html)
+        # One parse gives both the result count and the results
+        total_results, results = parse_serp(html)
+        return results, total_results if first_page else None
 
     def monitor_site(self, site, time_range, max_pages=100,advanced_query=None):
         """
@@ -184,105 +208,237 @@ class DomainMonitor:
         :param max_pages: 最大页数
         :param advanced_query: advanced search query to use with the build_google_advanced_search_url if set, or else uses the default
         :return: 搜索结果列表
-        
-        Monitor a site for search results over multiple pages.
-        :param site: The domain of the site to monitor.
-        :param time_range: The time range to filter the search results.
-        :param max_pages: The maximum number of pages to fetch.
-        :param advanced_query: Optional advanced search query.
-        :return: A list of search results.
+
+        Blocking version; from async code use monitor_site_async.
         """
-        all_results = []
-        total_pages = max_pages  # Default to max_pages if result count cannot be determined
-
-        for page in range(max_pages):
-            start = page * 100  # Google default 100 results per page
-            if advanced_query:
-                search_url = self.build_google_advanced_search_url(advanced_query, time_range, start)
-                self.logger.info(f"Monitoring advance url {search_url} for {time_range}, page {page+1}")
-                
+        return asyncio.run(self.monitor_site_async(site, time_range, max_pages, advanced_query))
+
+    async def _run_page(self, pacer, query, page, total_pages, state):
+        """
+        Fetch one (site, range, page) task under its engine's pacing, or from the SERP cache
+        :return: the next page's task arguments, or None when the query is finished
+        """
+        site, time_range, advanced_query = query
+        try:
+            search_url = self.search_url(site, time_range, page, advanced_query)
+        except Exception as e:
+            self.logger.error(f"Cannot build the search URL for {site} {time_range}: {str(e)}")
+            return None
+        params = parse_qs(urlparse(search_url).query)
+        key = (params['q'][0], params.get('tbs', [''])[0], page * 100)
+        cached = serp_cache.lookup(*key, state['max_age'])
+        if cached:
+            results, total_results = cached
+        else:
+            self.logger.info(f"Monitoring {site} for {time_range}, page {page + 1}: {search_url}")
+            async with pacer.slot(search_url):
+                try:
+                    results, total_results = await asyncio.to_thread(self.load_results_page, search_url, page == 0)
+                except Exception as e:
+                    self.logger.error(f"Error processing page {page + 1} for {site}: {str(e)}")
+                    return None
+                serp_cache.store(*key, results, total_results)
+                # The engine slot is held through the pause, so each lane keeps its pace
+                await pacer.pause(search_url)
+        if total_results is not None:
+            total_pages = min(total_pages, (total_results // 100) + 1)
+            state['counted'] = True
+            self.logger.info(f"Total results: {total_results}, Total pages: {total_pages}")
+        if not results:
+            self.logger.info(f"No more results found for {site} on page {page + 1}")
+            # An empty first page may be a CAPTCHA or consent page, so nothing is derived from it
+            state['complete'] = page > 0
+            return None
+        # Google repeats some results on later pages
+        fresh = [result for result in results if result['url'] not in state['seen']]
+        state['seen'].update(result['url'] for result in fresh)
+        state['undated'] = state['undated'] or any(result['date'] is None for result in fresh)
+        if state['results'] is not None:
+            state['results'].extend(fresh)
+        if state['on_page'] and fresh:
+            state['on_page'](query, fresh)
+        self.logger.info(f"Found {len(results)} results ({len(fresh)} new) for {site} on page {page + 1}"
+                         f"{' from cache' if cached else ''}")
+        if page + 1 >= total_pages:
+            self.logger.info(f"Reached the last page based on total results for {site}")
+            state['complete'] = state.get('counted', False)
+            return None
+        return page + 1, total_pages
+
+    async def page_through(self, queries, max_pages=100, on_page=None):
+        """
+        Page through several searches at once
+        :param queries: {(site, time_range, advanced_query or None): max age of cached pages in seconds}
+        :param max_pages: 最大页数 per query
+        :param on_page: called with (query, new results) as each page is parsed
+        :return: {query: {'results', 'seen', 'complete', 'undated'}}; complete means every page
+                 was read. 'results' is None when on_page is given, which takes them instead
+
+        Work is a queue of (query, page) tasks. A query's next page is queued
+        once its current page is parsed, so pages of one query stay in order
+        while different queries run side by side on the tab pool, each engine
+        limited by its ENGINE_PACING.
+        """
+        pacer = EnginePacer()
+        states = {query: {'results': None if on_page else [], 'seen': set(), 'complete': False, 'undated': False,
+                          'max_age': max_age, 'on_page': on_page}
+                  for query, max_age in queries.items()}
+        pending = asyncio.Queue()
+        for query in states:
+            pending.put_nowait((query, 0, max_pages))
+
+        async def worker():
+            while True:
+                query, page, total_pages = await pending.get()
+                try:
+                    following = await self._run_page(pacer, query, page, total_pages, states[query])
+                    if following is not None:
+                        pending.put_nowait((query, *following))
+                except Exception as e:
+                    # The query stops here, incomplete; the worker goes on with the queue
+                    self.logger.error(f"Error on page {page + 1} for {query[0]} {query[1]}: {str(e)}")
+                finally:
+                    pending.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(tabs.size, len(states))))]
+        try:
+            await pending.join()
+        finally:
+            for w in workers:
+                w.cancel()
+        return states
+
+    def range_since(self, time_range):
+        """Oldest result date, as stored in 'date', that still falls in time_range"""
+        return (datetime.now() - RANGE_SPANS[time_range]).strftime('%Y-%m-%d %H:%M:%S')
+
+    def derivable(self, state, time_range):
+        """Whether a narrower time range can be filtered out of the wider search in state"""
+        return time_range in RANGE_SPANS and state['complete'] and not state['undated']
+
+    def derive_range(self, state, time_range):
+        """Results of a narrower time range taken from a fully read wider one"""
+        since = self.range_since(time_range)
+        return [result for result in state['results'] if result['date'] >= since]
+
+    async def run_queries(self, queries, max_pages=100, on_page=None):
+        """
+        Results for each (site, time_range, advanced_query or None)
+        :param on_page: called with (query, new results) for every page searched
+        :return: {query: results}, or None when on_page is given: the results then only go to it
+
+        Ranges nest (24h within 1w within 1m ...), so per site only the widest
+        range asked for is searched. Its cached pages must be as fresh as the
+        narrowest range needs, and the narrower ranges are then filtered out
+        of it by result date. A narrower range is only searched itself when
+        the wide search was cut short or has undated results. With on_page the
+        narrower ranges get nothing of their own, since on_page already saw
+        every result of the wide search and can file it by date.
+        """
+        groups = {}
+        for site, time_range, advanced_query in queries:
+            groups.setdefault((site, advanced_query), []).append(time_range)
+        widest = {}
+        for (site, advanced_query), ranges in groups.items():
+            known = [r for r in RANGE_SPANS if r in ranges]
+            if not known:
+                continue
+            query = (site, known[-1], advanced_query)
+            widest[query] = min(SERP_TTLS[r] for r in known)
+        states = await self.page_through(widest, max_pages, on_page)
+
+        collected = None if on_page else {}
+        fallback = {}
+        for query in dict.fromkeys(queries):
+            site, time_range, advanced_query = query
+            if query in states:
+                if collected is not None:
+                    collected[query] = states[query]['results']
+                continue
+            wide = [q for q in states if q[0] == site and q[2] == advanced_query]
+            if not wide or not self.derivable(states[wide[0]], time_range):
+                fallback[query] = SERP_TTLS.get(time_range, min(SERP_TTLS.values()))
+            elif collected is not None:
+                collected[query] = self.derive_range(states[wide[0]], time_range)
+                self.logger.info(f"Derived {len(collected[query])} results for {site} {time_range} from {wide[0][1]}")
             else:
-                search_url = self.build_google_search_url(site, time_range, start)
-                self.logger.info(f"Monitoring nomal url {search_url} for {time_range}, page {page+1}")
+                self.logger.info(f"Filing {site} {time_range} results from the {wide[0][1]} search")
+        if fallback:
+            for query, state in (await self.page_through(fallback, max_pages, on_page)).items():
+                if collected is not None:
+                    collected[query] = state['results']
+        return collected
 
-            self.logger.info(f"Monitoring {site} for {time_range}, page {page + 1}")
+    async def monitor_site_async(self, site, time_range, max_pages=100, advanced_query=None):
+        """monitor_site without blocking the event loop"""
+        query = (site, time_range, advanced_query)
+        return (await self.run_queries([query], max_pages))[query]
 
-            try:
-                tab=browser.new_tab()
-                
-                tab.get(search_url)              
-                html=tab.html
-                if page == 0:  # Extract total result count only on the first page
-                    soup = BeautifulSoup(html, 'html.parser')
-                    result_stats = soup.select_one('#result-stats')
-                    print('result_stats=',result_stats)
-                    if result_stats:
-                        match = re.search(r'About ([\d,]+) results', result_stats.text)
-                        if match:
-                            total_results = int(match.group(1).replace(',', ''))
-                            total_pages = min(max_pages, (total_results // 100) + 1)
-                            self.logger.info(f"Total results: {total_results}, Total pages: {total_pages}")
-
-                results = self.extract_search_results(html)
-                if not results:  # If no results are found for a page, assume there are no more pages
-                    self.logger.info(f"No more results found for {site} on page {page + 1}")
-                    break
-
-                all_results.extend(results)
-                self.logger.info(f"Found {len(results)} results for {site} on page {page + 1}")
-
-                # Random delay to avoid requests being too fast
-                time.sleep(random.uniform(2, 5))
-
-                if page + 1 >= total_pages:
-                    self.logger.info(f"Reached the last page based on total results for {site}")
-                    break
-
-            except requests.exceptions.RequestException as e:
-                self.logger.error(f"Error fetching page {page + 1} for {site}: {str(e)}")
-                break  # If a page cannot be fetched, then break
-            except Exception as e:
-                self.logger.error(f"Error processing page {page + 1} for {site}: {str(e)}")
-                break  # If there are any other exceptions when processing the results, then break
-
-        return all_results
-    
-    def monitor_all_sites(self, time_ranges=None, advanced_queries=None):
+    async def monitor_all_sites_async(self, sink, time_ranges=None, advanced_queries=None):
         """
-        监控所有网站
-        :param time_ranges: 时间范围列表
-         :param advanced_queries: Dictionary of site to advanced_query, if a site has no entry, then the default search will be used
-        :return: 包含所有结果的DataFrame
+        Every site and time range as one concurrent batch, written to sink page by page
+        :param sink: ResultSink the tagged results are appended to
         """
         if time_ranges is None:
             time_ranges = ['24h']
-            
-        all_results = []
         if len(self.sites)==0:
             print('please provide sites')
-            # return 
-        for site in self.sites:
-            for time_range in time_ranges:
-                 advanced_query = advanced_queries.get(site) if advanced_queries else None
-                 results = self.monitor_site(site, time_range, advanced_query=advanced_query)  # re-use monitor_site
-                 for result in results:
-                    result.update({
-                        'site': site,
-                        'time_range': time_range,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                 all_results.extend(results)
-        
-        # 转换为DataFrame并保存
-        if all_results:
-            df = pd.DataFrame(all_results)
+        queries = [(site, time_range, advanced_queries.get(site) if advanced_queries else None)
+                   for site in self.sites for time_range in time_ranges]
+        # Narrowest first, so a dated result is filed under the tightest range it falls in
+        ranges = [r for r in RANGE_SPANS if r in time_ranges and RANGE_SPANS[r]]
+        order = list(RANGE_SPANS)
+        # (site, url) -> position in order of the range it was last written under
+        filed = {}
+
+        def on_page(query, results):
+            # A URL is written once per site, and again only when a narrower range turns it
+            # up later (an undated result of the wide search found by a fallback search)
+            site, searched_range, _ = query
+            rows = []
+            for result in results:
+                time_range = searched_range
+                if result['date']:
+                    time_range = next((r for r in ranges if result['date'] >= self.range_since(r)), searched_range)
+                rank = order.index(time_range) if time_range in order else len(order)
+                if filed.get((site, result['url']), len(order) + 1) <= rank:
+                    continue
+                filed[(site, result['url'])] = rank
+                rows.append({
+                    **result,
+                    'site': site,
+                    'time_range': time_range,
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+            sink.write(rows)
+
+        try:
+            await self.run_queries(queries, on_page=on_page)
+        finally:
+            tabs.close()
+            serp_cache.report()
+
+    def monitor_all_sites(self, time_ranges=None, advanced_queries=None, output_file=None):
+        """
+        监控所有网站
+        :param time_ranges: 时间范围列表
+         :param advanced_queries: Dictionary of site to advanced_query, if a site has no entry, then the default search will be used
+        :param output_file: .csv or .jsonl file the results are appended to as they are found
+        :return: summary counts of what was written
+        """
+        if output_file is None:
             output_file = f'game_monitor_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-            df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        sink = ResultSink(output_file)
+        try:
+            asyncio.run(self.monitor_all_sites_async(sink, time_ranges, advanced_queries))
+        finally:
+            sink.close()
+        if sink.total:
             self.logger.info(f"Results saved to {output_file}")
-            return df
         else:
             self.logger.warning("No results found")
-            return pd.DataFrame()
+        sink.report()
+        return sink.summary()
 
 def main():
     """主函数"""
@@ -302,17 +458,9 @@ def main():
     }
     
     # 开始监控
-    results_df = monitor.monitor_all_sites(advanced_queries=advanced_queries)
-    os.mkdirs('result',exist_ok=True)
-    results_df.to_csv('result/report.csv')
-    # 输出统计信息
-    if not results_df.empty:
-        print("\n=== 监控统计 ===")
-        print(f"总计发现新页面: {len(results_df)}")
-        print("\n按网站统计:")
-        print(results_df['site'].value_counts())
-        print("\n按时间范围统计:")
-        print(results_df['time_range'].value_counts())
+    os.makedirs('result',exist_ok=True)
+    # Rows land in the report as each results page is parsed; the statistics are printed at the end
+    monitor.monitor_all_sites(advanced_queries=advanced_queries, output_file='result/report.csv')
 
 if __name__ == "__main__":
     main()
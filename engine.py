@@ -0,0 +1,257 @@
+import os
+import sys
+import asyncio
+import aiohttp
+from datetime import datetime
+from d1 import d1_query, D1_MAX_PARAMS
+from sitemap import traverse_sitemaps, SitemapState
+from robots import robots
+from httpcache import http_cache
+from transport import create_session, host_slots
+from fetchrouter import router
+from providers import PROVIDERS
+
+FULL_REFRESH_DAYS = int(os.getenv('FULL_REFRESH_DAYS', 30))
+# Rows per upsert batch for providers with a bulk API collector
+UPSERT_BATCH = 100
+# SITEMAP_ONLY=1 skips the API collectors and crawls model pages instead
+SITEMAP_ONLY = os.getenv('SITEMAP_ONLY', '') not in ('', '0')
+
+
+# Helper: Create the provider's table in the database
+async def create_table_if_not_exists(session, provider):
+    columns = ''.join(f"        {name} INTEGER,\n" for name in provider['columns'])
+    columns += ''.join(f"        {name} TEXT,\n" for name in provider.get('extra', {}))
+    create_table_sql = f"""
+    CREATE TABLE IF NOT EXISTS {provider['table']} (
+        id SERIAL PRIMARY KEY,
+        model_url TEXT UNIQUE,
+{columns}        createAt TEXT,
+        updateAt TEXT
+    );
+    """
+    if await d1_query(session, create_table_sql) is not None:
+        print(f"[INFO] Table {provider['table']} checked/created successfully.")
+
+
+# Helper: Insert or update a batch of (model_url, counts) rows
+async def upsert_batch(session, provider, rows):
+    current_time = datetime.utcnow().isoformat()
+    table = provider['table']
+    extra = provider.get('extra', {})
+    names = ['model_url'] + provider['columns'] + list(extra) + ['createAt', 'updateAt']
+    # A count the source did not report (None) keeps the stored value
+    updates = ', '.join(f"{name} = COALESCE(excluded.{name}, {table}.{name})" for name in provider['columns'])
+    placeholders = f"({', '.join('?' for _ in names)})"
+    per_statement = max(1, D1_MAX_PARAMS // len(names))
+    ok = True
+    for start in range(0, len(rows), per_statement):
+        chunk = rows[start:start + per_statement]
+        values = []
+        for model_url, counts in chunk:
+            values += [model_url] + list(counts) + list(extra.values()) + [current_time, current_time]
+        sql = f"""
+        INSERT INTO {table} ({', '.join(names)})
+        VALUES {', '.join(placeholders for _ in chunk)}
+        ON CONFLICT (model_url) DO UPDATE SET {updates}, updateAt = excluded.updateAt;
+        """
+        if await d1_query(session, sql, values) is None:
+            print(f"[ERROR] Failed to upsert {len(chunk)} rows into {table}")
+            ok = False
+    return ok
+
+
+# Helper: Insert or update one model's numbers
+async def upsert_model_data(session, provider, model_url, counts):
+    if not await upsert_batch(session, provider, [(model_url, counts)]):
+        print(f"[ERROR] Failed to upsert data for {model_url}")
+        return False
+    print(f"[INFO] Data upserted for {model_url}: {dict(zip(provider['columns'], counts))}")
+    return True
+
+
+# Stands in for the counts when the page body is identical to the one last saved
+UNCHANGED = object()
+
+
+# Helper: Fetch model page and extract its numbers.
+# Returns (counts, body digest); counts is None when they are missing, UNCHANGED when the page is
+async def get_model_counts(session, provider, url):
+    if not await robots.can_fetch(session, url):
+        print(f"[INFO] Disallowed by robots.txt: {url}")
+        return None, None
+    await robots.wait(session, url)
+    extractor = provider['extractor']
+    wanted = len(provider['columns'])
+    texts, digest = [], None
+    # Patterns whose numbers only appear after rendering go straight to a browser tab
+    rendered = router.route(url) == 'browser'
+    if rendered:
+        texts = await router.render_texts(url, extractor)
+    if not texts:
+        async with host_slots(url):
+            try:
+                if http_cache.worth_caching(url):
+                    # The whole body is read so it can be stored; unchanged pages come back as a 304.
+                    # Hosts that send no ETag / Last-Modified stream instead and can stop early
+                    page = await http_cache.fetch(session, url)
+                    if page.unchanged:
+                        return UNCHANGED, page.digest
+                    digest = page.digest
+                    texts = extractor.texts(page.text())
+                else:
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        if wanted == 1:
+                            text = await extractor.first_text_streamed(response)
+                            texts = [text] if text is not None else []
+                        else:
+                            texts = extractor.texts(await response.text())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"[ERROR] Failed to fetch model page {url}: {e}")
+                return None, None
+        if texts:
+            router.record(url, 'http')
+        elif not rendered:
+            texts = await router.escalate(url, extractor)
+            if texts:
+                # The numbers came from the rendered page, which the HTTP body's digest does not cover
+                digest = None
+    counts = [provider['normalize'](t) for t in texts[:wanted]]
+    if len(counts) < wanted or None in counts:
+        print(f"[WARNING] No run count found on page: {url}")
+        return None, digest
+    return counts, digest
+
+
+async def process_model_url(session, provider, model_url, state=None, lastmod=None):
+    print(f"[INFO] Processing model: {model_url}")
+    counts, digest = await get_model_counts(session, provider, model_url)
+    if counts is UNCHANGED:
+        print(f"[INFO] Page unchanged since the last save: {model_url}")
+        if state is not None:
+            state.mark_done(model_url, lastmod)
+        return
+    if counts is not None:
+        if await upsert_model_data(session, provider, model_url, counts):
+            # Only a saved page may short-circuit the next run
+            http_cache.remember_digest(model_url, digest)
+            if state is not None:
+                state.mark_done(model_url, lastmod)
+
+
+async def run_collector(session, provider, name, listed=None):
+    """
+    Stream a provider's bulk API into batched upserts, returns the URLs it covered.
+    With `listed` ({model key: sitemap URL}) rows are stored under the sitemap URL,
+    and models the sitemap does not list are left out.
+    """
+    covered = set()
+    batch = []
+    tasks = []
+    unlisted = 0
+    async for model_url, counts in provider['collector'](session):
+        if listed is not None:
+            model_url = listed.get(provider['collector_key'](model_url))
+            if model_url is None:
+                unlisted += 1
+                continue
+        if model_url in covered:
+            continue
+        covered.add(model_url)
+        batch.append((model_url, counts))
+        if len(batch) >= UPSERT_BATCH:
+            tasks.append(asyncio.create_task(upsert_batch(session, provider, batch)))
+            batch = []
+    if batch:
+        tasks.append(asyncio.create_task(upsert_batch(session, provider, batch)))
+    results = await asyncio.gather(*tasks)
+    print(f"[INFO] {name}: {len(covered)} models from the API, {unlisted} not in the sitemap, "
+          f"{results.count(False)} of {len(results)} batches failed")
+    return covered
+
+
+async def sitemap_entries(session, provider, state):
+    """(model_url, lastmod) for every model page in the provider's sitemaps, clean_url applied"""
+    clean_url = provider.get('clean_url')
+    async for model_url, lastmod in traverse_sitemaps(session, provider['sitemap'], include=provider['include'],
+                                                       state=state, robots=robots):
+        if clean_url is not None:
+            model_url = clean_url(model_url)
+            if model_url is None:
+                continue
+        yield model_url, lastmod
+
+
+async def replay(entries):
+    for entry in entries:
+        yield entry
+
+
+async def run_provider(session, name):
+    provider = PROVIDERS[name]
+    print(f"[INFO] Starting {name}...")
+    await create_table_if_not_exists(session, provider)
+    state = SitemapState(provider['state_file'], FULL_REFRESH_DAYS) if provider.get('state_file') else None
+    try:
+        await scrape_provider(session, provider, name, state)
+    finally:
+        # Whatever finished is kept even when a scrape or the sitemap walk failed
+        if state is not None:
+            state.save()
+
+
+async def scrape_provider(session, provider, name, state):
+    entries = sitemap_entries(session, provider, state)
+    covered = set()
+    if provider.get('collector') and not SITEMAP_ONLY:
+        listed = None
+        if provider.get('collector_key'):
+            # The whole sitemap is read first so API rows can be keyed like the stored ones
+            found = [entry async for entry in entries]
+            listed = {provider['collector_key'](url): url for url, _ in found}
+            entries = replay(found)
+        covered = await run_collector(session, provider, name, listed)
+        if not provider.get('sitemap_fallback'):
+            return
+
+    # Model pages are scraped while the sitemap tree is still being walked
+    tasks = []
+    seen = set()
+    async for model_url, lastmod in entries:
+        if model_url in seen:
+            continue
+        seen.add(model_url)
+        if model_url in covered:
+            continue
+        if state is None or state.is_due(model_url, lastmod):
+            tasks.append(asyncio.create_task(process_model_url(session, provider, model_url, state, lastmod)))
+
+    if not seen:
+        print(f"[ERROR] No model URLs found for {name}.")
+        return
+    print(f"[INFO] {name}: {len(tasks)} of {len(seen)} models queued, {len(seen & covered)} already from the API")
+    await asyncio.gather(*tasks)
+    print(f"[INFO] {name} complete. Run count scan: {provider['extractor'].stats}")
+
+
+async def run_providers(names=None):
+    """Run any subset of PROVIDERS in one event loop on one pooled session and its per-host budgets"""
+    names = names or list(PROVIDERS)
+    try:
+        async with create_session() as session:
+            await asyncio.gather(*(run_provider(session, name) for name in names))
+    finally:
+        if http_cache.enabled:
+            http_cache.report()
+        http_cache.close()
+        router.close()
+
+
+# Run the script: python engine.py [provider ...], or PROVIDERS=replicate,civitai
+if __name__ == "__main__":
+    selected = sys.argv[1:] or [n for n in os.getenv('PROVIDERS', '').split(',') if n]
+    unknown = [n for n in selected if n not in PROVIDERS]
+    if unknown:
+        sys.exit(f"Unknown providers: {', '.join(unknown)}. Choose from: {', '.join(PROVIDERS)}")
+    asyncio.run(run_providers(selected))
@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import time
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # BeautifulSoup only
+    etree = lxml_html = None
+
+# Set EXTRACTOR_BACKEND=bs4 to force the old html.parser path
+BACKEND = os.getenv('EXTRACTOR_BACKEND', 'lxml' if lxml_html is not None else 'bs4')
+# Response bytes handed to the incremental parser at a time
+STREAM_CHUNK_SIZE = 16 * 1024
+# A displayed count: digits with thousands separators, an optional decimal part and k/m/b suffix.
+# The suffix must end a word, so '12 models' is 12 and not 12M
+COUNT_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kmb]?)\b')
+MULTIPLIERS = {'': 1, 'k': 1000, 'm': 1000000, 'b': 1000000000}
+
+
+def parse_count(text, last=False):
+    """'1.2k' / '3,400' / '2M runs' -> int, None if there is no number; last=True reads the last one"""
+    matches = COUNT_PATTERN.findall((text or '').lower())
+    if not matches:
+        return None
+    number, suffix = matches[-1 if last else 0]
+    return int(float(number.replace(',', '')) * MULTIPLIERS[suffix])
+
+
+def class_xpath(tag, classes):
+    """XPath for <tag> elements carrying every class in the space separated list"""
+    tests = ' and '.join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes.split()
+    )
+    return f"//{tag}[{tests}]"
+
+
+class Extractor:
+    """
+    A selector compiled once and run on lxml's C parser.
+
+    `xpath` is compiled at construction from `selector`, which browser tabs
+    wait for before reading a rendered page; `soup_find(soup)` returns the same
+    elements from a BeautifulSoup tree and is used when lxml is missing,
+    fails on a page, or EXTRACTOR_BACKEND=bs4.
+    """
+
+    def __init__(self, xpath, soup_find, target=None):
+        self.selector = xpath
+        self.xpath = etree.XPath(xpath) if etree is not None else None
+        self.soup_find = soup_find
+        # (tag, {classes}) the streaming scan stops at; None means always read everything
+        self.target = target
+        self.stats = {'streamed': 0, 'early_exits': 0, 'bytes_read': 0}
+
+    @classmethod
+    def by_class(cls, tag, classes):
+        return cls(class_xpath(tag, classes), lambda soup: soup.find_all(tag, class_=classes),
+                   target=(tag, set(classes.split())))
+
+    def texts(self, text):
+        """get_text(strip=True) of every match, in document order"""
+        if BACKEND == 'lxml' and self.xpath is not None:
+            try:
+                tree = lxml_html.fromstring(text)
+                return [''.join(s.strip() for s in el.itertext()) for el in self.xpath(tree)]
+            except (etree.ParserError, ValueError):
+                pass
+        soup = BeautifulSoup(text, "html.parser")
+        return [el.get_text(strip=True) for el in self.soup_find(soup)]
+
+    def first_text(self, text):
+        found = self.texts(text)
+        return found[0] if found else None
+
+    async def first_text_streamed(self, response):
+        """
+        Like first_text(await response.text()), but the body is fed to an
+        incremental parser as it downloads and the connection is closed as soon
+        as the target element has been read. On a miss the buffered body gets a
+        regular full parse.
+        """
+        if self.target is None or BACKEND != 'lxml' or self.xpath is None:
+            return self.first_text(await response.text())
+        tag, classes = self.target
+        parser = etree.HTMLPullParser(events=('start', 'end'), tag=tag, encoding=response.charset)
+        chunks = []
+        matched = None
+        self.stats['streamed'] += 1
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            self.stats['bytes_read'] += len(chunk)
+            parser.feed(chunk)
+            for event, el in parser.read_events():
+                if matched is None and event == 'start' and classes <= set(el.get('class', '').split()):
+                    matched = el
+                elif event == 'end' and el is matched:
+                    self.stats['early_exits'] += 1
+                    # Leave the rest unread; the connection is dropped, not pooled
+                    response.close()
+                    return ''.join(s.strip() for s in el.itertext())
+        body = b''.join(chunks)
+        return self.first_text(body.decode(response.charset or 'utf-8', errors='replace'))
+
+
+# Micro-benchmark: per-page cost of lxml+XPath vs. BeautifulSoup html.parser
+def build_fixture_page():
+    """A model page shaped like replicate's: small header, large inline JSON"""
+    payload = ','.join(f'{{"id": {i}, "name": "version-{i}", "cog": "{"x" * 200}"}}' for i in range(2000))
+    return (
+        '<html><head><title>model</title></head><body>'
+        '<ul class="mt-3 flex gap-4 items-center flex-wrap"><li>Public</li><li>1.2M runs</li></ul>'
+        + '<div class="card"><p>readme</p></div>' * 500
+        + f'<script id="__NEXT_DATA__" type="application/json">[{payload}]</script>'
+        '</body></html>'
+    )
+
+
+def benchmark(extractor, pages, rounds=5):
+    global BACKEND
+    for backend in ('lxml', 'bs4'):
+        if backend == 'lxml' and extractor.xpath is None:
+            print("lxml not installed, skipping")
+            continue
+        BACKEND = backend
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for page in pages:
+                extractor.texts(page)
+        per_page = (time.perf_counter() - started) / (rounds * len(pages))
+        print(f"{backend:<5} {per_page * 1000:8.2f} ms/page  sample: {extractor.first_text(pages[0])!r}")
+
+
+if __name__ == "__main__":
+    # python extract.py [tag "class list" saved_page.html ...]
+    if len(sys.argv) > 3:
+        tag, classes = sys.argv[1], sys.argv[2]
+        pages = []
+        for path in sys.argv[3:]:
+            with open(path, encoding='utf8', errors='replace') as f:
+                pages.append(f.read())
+    else:
+        tag, classes = 'ul', 'mt-3 flex gap-4 items-center flex-wrap'
+        pages = [build_fixture_page()]
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / len(pages) / 1024:.0f} KB average")
+    benchmark(Extractor.by_class(tag, classes), pages)
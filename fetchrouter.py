@@ -0,0 +1,138 @@
+import os
+import json
+import asyncio
+from urllib.parse import urlsplit, parse_qsl
+
+# Where the per-pattern decisions are kept between runs
+ROUTES_FILE = os.getenv('FETCH_ROUTES', 'fetch-routes.json')
+# A pattern routed to the browser gets a plain HTTP try again every this many fetches
+REPROBE_EVERY = 50
+# Renders of a pattern that found nothing either way before it is left on HTTP
+MAX_FUTILE_RENDERS = 3
+# Seconds a rendered page gets for the extractor's selector to appear
+RENDER_WAIT = 10
+
+
+def url_pattern(url):
+    """
+    'https://replicate.com/owner/model?x=1' -> 'replicate.com/*/*?x'.
+    Only the host, the path depth and the query keys stay, so every model
+    page of a provider shares one decision however many owners it has.
+    """
+    parts = urlsplit(url)
+    depth = len([s for s in parts.path.split('/') if s])
+    keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return parts.netloc + '/' + '/'.join('*' * depth) + ('?' + '&'.join(keys) if keys else '')
+
+
+class FetchRouter:
+    """
+    Decides per URL pattern whether a page can be read over plain HTTP or has
+    to be rendered in a browser tab.
+
+    A pattern starts out on HTTP. When the extractor finds nothing in the HTTP
+    body the page is rendered in a pooled tab; if the selector shows up there,
+    the pattern is routed to the browser from then on (with an occasional HTTP
+    re-probe), and if it is found over HTTP the pattern stays on HTTP. Misses
+    on a pattern already proven to work over HTTP are taken as pages that
+    simply lack the element and are not rendered.
+    """
+
+    def __init__(self, path=ROUTES_FILE):
+        self.path = path
+        self.routes = {}
+        self.uses = {}
+        self.futile = {}
+        self.deciding = {}
+        self.tabs = None
+        self.browser_available = True
+        self.stats = {'http': 0, 'browser': 0, 'escalated': 0}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf8') as f:
+                self.routes = json.load(f)
+
+    def route(self, url):
+        """'http', or 'browser' for patterns known to need rendering"""
+        pattern = url_pattern(url)
+        if self.routes.get(pattern) != 'browser' or not self.browser_available:
+            return 'http'
+        self.uses[pattern] = self.uses.get(pattern, 0) + 1
+        return 'http' if self.uses[pattern] % REPROBE_EVERY == 0 else 'browser'
+
+    def record(self, url, route):
+        pattern = url_pattern(url)
+        if self.routes.get(pattern) != route:
+            print(f"[INFO] Fetch route for {pattern}: {route}")
+            self.routes[pattern] = route
+        self.stats[route] += 1
+
+    def _render(self, url, extractor):
+        if self.tabs is None:
+            # Imported here so HTTP-only runs need no browser installed
+            from tabpool import TabPool
+            self.tabs = TabPool()
+        with self.tabs.tab() as tab:
+            tab.get(url)
+            # Eager loading returns at DOMContentLoaded, before scripts have filled the page in
+            tab.wait.eles_loaded('xpath:' + extractor.selector, timeout=RENDER_WAIT)
+            return tab.html
+
+    async def render(self, url, extractor):
+        """HTML of url once extractor's selector shows up in a pooled tab, None when no browser can be used"""
+        if not self.browser_available:
+            return None
+        try:
+            return await asyncio.to_thread(self._render, url, extractor)
+        except ImportError as e:
+            print(f"[WARNING] No browser available, staying on HTTP: {e}")
+            self.browser_available = False
+        except Exception as e:
+            print(f"[ERROR] Browser fetch failed for {url}: {e}")
+        return None
+
+    async def render_texts(self, url, extractor):
+        html = await self.render(url, extractor)
+        texts = extractor.texts(html) if html else []
+        if texts:
+            self.record(url, 'browser')
+        return texts
+
+    async def escalate(self, url, extractor):
+        """
+        The HTTP body lacked the selector: try the browser and remember the outcome.
+        Only one render of an undecided pattern runs at a time; the others wait
+        for its verdict instead of all opening tabs for the same question.
+        """
+        pattern = url_pattern(url)
+        async with self.deciding.setdefault(pattern, asyncio.Lock()):
+            if self.routes.get(pattern) == 'http' or not self.browser_available:
+                return []
+            if self.routes.get(pattern) != 'browser':
+                self.stats['escalated'] += 1
+                texts = await self.render_texts(url, extractor)
+                if not texts:
+                    self.futile[pattern] = self.futile.get(pattern, 0) + 1
+                    if self.futile[pattern] >= MAX_FUTILE_RENDERS:
+                        print(f"[INFO] Rendering does not help {pattern}, keeping it on HTTP")
+                        self.routes[pattern] = 'http'
+                return texts
+        # Settled on the browser while this one waited, so it renders without the lock
+        self.stats['escalated'] += 1
+        return await self.render_texts(url, extractor)
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w', encoding='utf8') as f:
+                json.dump(self.routes, f, indent=1, sort_keys=True)
+
+    def close(self):
+        self.save()
+        if self.tabs is not None:
+            self.tabs.close()
+            self.tabs = None
+        if any(self.stats.values()):
+            print(f"[INFO] Fetch routes used: {self.stats}")
+
+
+# Shared by every scraper in the process
+router = FetchRouter()
@@ -0,0 +1,118 @@
+import sqlite3
+import hashlib
+from urllib.parse import urlsplit
+
+QUEUED, IN_FLIGHT, DONE, FAILED = 0, 1, 2, 3
+# Writes are committed in batches of this size (and on checkpoint/close)
+COMMIT_EVERY = 1000
+
+
+def url_hash(url):
+    """64-bit URL fingerprint, signed so it fits an SQLite INTEGER key"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf8'), digest_size=8).digest(), 'big', signed=True)
+
+
+class UrlFrontier:
+    """
+    Persistent crawl frontier backed by SQLite.
+
+    Every URL ever seen is one row keyed by its 64-bit hash, so the seen check
+    is a primary-key lookup and nothing but the current batch lives in memory.
+    Queued URLs are handed out per host (round-robin over hosts, lowest
+    priority value first within a host). URLs that were in flight when a crawl
+    died are queued again when the frontier is reopened.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                hash INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                host TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                state INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (state, host, priority)')
+        self.restore()
+        self.seen_count = self.conn.execute('SELECT COUNT(*) FROM frontier').fetchone()[0]
+        self._pending_writes = 0
+
+    def restore(self):
+        """Put URLs left in flight by a killed crawl back in the queue"""
+        cur = self.conn.execute('UPDATE frontier SET state = ? WHERE state = ?', (QUEUED, IN_FLIGHT))
+        self.conn.commit()
+        if cur.rowcount:
+            print(f"[INFO] Requeued {cur.rowcount} URLs left in flight by the last crawl")
+
+    def checkpoint(self):
+        self.conn.commit()
+        self._pending_writes = 0
+
+    def _wrote(self, count=1):
+        self._pending_writes += count
+        if self._pending_writes >= COMMIT_EVERY:
+            self.checkpoint()
+
+    def seen(self, url):
+        return self.conn.execute('SELECT 1 FROM frontier WHERE hash = ?', (url_hash(url),)).fetchone() is not None
+
+    def add(self, url, priority=0):
+        """Queue a URL unless it was seen before; returns True if it is new"""
+        cur = self.conn.execute(
+            'INSERT OR IGNORE INTO frontier (hash, url, host, priority, state) VALUES (?, ?, ?, ?, ?)',
+            (url_hash(url), url, urlsplit(url).netloc, priority, QUEUED),
+        )
+        if cur.rowcount:
+            self.seen_count += 1
+            self._wrote()
+            return True
+        return False
+
+    def pop(self, count):
+        """Take up to count queued (url, priority) pairs, spread over hosts, and mark them in flight"""
+        hosts = [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT host FROM frontier WHERE state = ? LIMIT ?', (QUEUED, count))]
+        if not hosts:
+            return []
+        per_host = max(1, count // len(hosts))
+        batch = []
+        for host in hosts:
+            batch.extend(self.conn.execute(
+                'SELECT hash, url, priority FROM frontier WHERE state = ? AND host = ? '
+                'ORDER BY priority LIMIT ?', (QUEUED, host, per_host)).fetchall())
+        self.conn.executemany('UPDATE frontier SET state = ? WHERE hash = ?',
+                              [(IN_FLIGHT, row[0]) for row in batch])
+        self._wrote(len(batch))
+        return [(url, priority) for _, url, priority in batch]
+
+    def has_queued(self):
+        return self.conn.execute('SELECT 1 FROM frontier WHERE state = ? LIMIT 1', (QUEUED,)).fetchone() is not None
+
+    def _set_state(self, url, state):
+        self.conn.execute('UPDATE frontier SET state = ? WHERE hash = ?', (state, url_hash(url)))
+        self._wrote()
+
+    def done(self, url):
+        self._set_state(url, DONE)
+
+    def failed(self, url):
+        self._set_state(url, FAILED)
+
+    def crawled(self):
+        """Iterate over every successfully crawled URL"""
+        for (url,) in self.conn.execute('SELECT url FROM frontier WHERE state = ?', (DONE,)):
+            yield url
+
+    def counts(self):
+        rows = self.conn.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall()
+        names = {QUEUED: 'queued', IN_FLIGHT: 'in_flight', DONE: 'done', FAILED: 'failed'}
+        return {names[state]: count for state, count in rows}
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
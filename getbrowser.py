@@ -2,10 +2,31 @@ from dotenv import load_dotenv
 from DrissionPage import Chromium, ChromiumOptions
 import os,sys
 import json
+import atexit
+import threading
+import time
 import platform
 import subprocess
 from pathlib import Path
 
+# 'scrape' (default) strips pages down to their DOM, 'default' is a plain headless browser
+BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'scrape')
+# Resource types the scrape profile blocks, as Network.setBlockedURLs patterns
+RESOURCE_PATTERNS = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*'],
+    'stylesheet': ['*.css*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*'],
+}
+BLOCK_RESOURCES = [t for t in os.getenv('BLOCK_RESOURCES', 'image,font,stylesheet,media').split(',') if t]
+# Third-party hosts no scraper needs: analytics, tag managers, ads
+BLOCK_URLS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*plausible.io*', '*segment.io*', '*hotjar.com*',
+]
+BLOCK_URLS += [p for p in os.getenv('BLOCK_URLS', '').split(',') if p]
+SCRAPE_WINDOW_SIZE = '800,600'
+
 def find_chrome_path():
     """Find Chrome browser path based on operating system"""
     system = platform.system()
@@ -64,7 +85,7 @@ def find_chrome_path():
     print("Chrome not found in common locations")
     return None
 
-def setup_chrome():
+def setup_chrome(profile=None):
     """Setup Chrome with appropriate configurations"""
     chrome_path = find_chrome_path()
     if not chrome_path:
@@ -80,10 +101,107 @@ def setup_chrome():
     co.auto_port()
     # co.new_env()
     co.headless()
+    if (profile or BROWSER_PROFILE) == 'scrape':
+        co.set_argument('--disable-gpu')
+        co.set_argument('--disable-extensions')
+        co.set_argument('--window-size', SCRAPE_WINDOW_SIZE)
+        co.no_imgs(True)
+        co.mute(True)
+        # tab.get returns at DOMContentLoaded instead of waiting for every subresource
+        co.set_load_mode('eager')
 
     return Chromium(co)
 
 
+def blocked_patterns(resources=None, urls=None):
+    resources = BLOCK_RESOURCES if resources is None else resources
+    urls = BLOCK_URLS if urls is None else urls
+    return [p for name in resources for p in RESOURCE_PATTERNS[name]] + list(urls)
+
+
+def prepare_tab(tab, profile=None):
+    """Apply the profile's request blocking to a new tab"""
+    if (profile or BROWSER_PROFILE) == 'scrape':
+        tab.set.blocked_urls(blocked_patterns())
+    return tab
+
+
+# One browser per process, started by the first user and quit when the last one lets go
+_browser = None
+_browser_refs = 0
+_browser_lock = threading.Lock()
+
+
+def acquire_browser():
+    """Shared browser, launched on first use; pair every call with release_browser()"""
+    global _browser, _browser_refs
+    with _browser_lock:
+        if _browser is None:
+            print("[INFO] Starting browser")
+            _browser = setup_chrome()
+        _browser_refs += 1
+        return _browser
+
+
+def release_browser():
+    global _browser, _browser_refs
+    with _browser_lock:
+        if _browser_refs == 0:
+            return
+        _browser_refs -= 1
+        if _browser_refs == 0:
+            _quit_browser()
+
+
+def _quit_browser():
+    global _browser
+    if _browser is not None:
+        print("[INFO] Stopping browser")
+        try:
+            _browser.quit()
+        except Exception as e:
+            print(f"[WARNING] Browser did not quit cleanly: {e}")
+        _browser = None
+
+
+def browser_alive():
+    """False once the shared browser has been started and its process is gone"""
+    with _browser_lock:
+        if _browser is None:
+            return True
+        try:
+            return _browser.states.is_alive
+        except Exception:
+            return False
+
+
+@atexit.register
+def shutdown_browser():
+    """Quit the shared browser at exit even if a user never released it"""
+    global _browser_refs
+    with _browser_lock:
+        _browser_refs = 0
+        _quit_browser()
+
+
+def benchmark(urls, rounds=3):
+    """Average tab.get time per URL with the default and the scrape profile"""
+    for profile in ('default', 'scrape'):
+        browser = setup_chrome(profile)
+        try:
+            tab = prepare_tab(browser.new_tab(), profile)
+            for url in urls:
+                timings = []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    tab.get(url)
+                    timings.append(time.perf_counter() - started)
+                    tab.get('about:blank')
+                print(f"{profile:<8} {sum(timings) / len(timings):6.2f}s  {url}")
+        finally:
+            browser.quit()
+
+
 def main():
     print("System Information:")
     print(f"Operating System: {platform.system()}")
@@ -103,4 +221,9 @@ def main():
             browser.quit()
 
 if __name__ == "__main__":
-    main()
+    # python getbrowser.py bench [url ...]
+    if sys.argv[1:2] == ['bench']:
+        benchmark(sys.argv[2:] or ['https://huggingface.co/models?sort=trending',
+                                   'https://huggingface.co/spaces?sort=trending'])
+    else:
+        main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import asyncio
+import aiohttp
+from transport import create_session
+
+# Point at a local stand-in server with HF_API_BASE=http://127.0.0.1:8000
+HF_API_BASE = os.getenv('HF_API_BASE', 'https://huggingface.co')
+HF_SITE = 'https://huggingface.co'
+# Largest page the listing API hands out
+PAGE_LIMIT = 1000
+
+# Listing endpoint, fields asked for and page URL of each repo type
+KINDS = {
+    'models': {
+        'path': '/api/models',
+        'expand': ['likes', 'downloads', 'createdAt', 'trendingScore'],
+        'url': HF_SITE + '/{id}',
+    },
+    'spaces': {
+        'path': '/api/spaces',
+        'expand': ['likes', 'createdAt', 'trendingScore'],
+        'url': HF_SITE + '/spaces/{id}',
+    },
+    'datasets': {
+        'path': '/api/datasets',
+        'expand': ['likes', 'downloads', 'createdAt', 'trendingScore'],
+        'url': HF_SITE + '/datasets/{id}',
+    },
+}
+
+
+async def _open_page(session, url, params=None):
+    response = await session.get(url, params=params)
+    try:
+        response.raise_for_status()
+    except aiohttp.ClientResponseError:
+        response.release()
+        raise
+    return response
+
+
+async def iter_listing(session, kind, sort='trendingScore', max_items=None, page_size=PAGE_LIMIT):
+    """
+    Yield one dict per repo from the Hugging Face listing API.
+
+    Pages are followed through the cursor in the Link header. The request
+    for the next page goes out as soon as the current page's headers are in,
+    so it downloads while this page is decoded and consumed.
+    """
+    spec = KINDS[kind]
+    params = [('sort', sort), ('direction', '-1'), ('limit', str(page_size))]
+    params += [('expand[]', field) for field in spec['expand']]
+    response = await _open_page(session, HF_API_BASE + spec['path'], params)
+    upcoming = None
+    count = 0
+    try:
+        while response is not None:
+            next_link = response.links.get('next')
+            if next_link and (max_items is None or count + page_size < max_items):
+                upcoming = asyncio.create_task(_open_page(session, str(next_link['url'])))
+            try:
+                repos = await response.json()
+            finally:
+                response.release()
+            for repo in repos:
+                item = {field: repo.get(field) for field in spec['expand']}
+                item['id'] = repo['id']
+                item['model_url'] = spec['url'].format(id=repo['id'])
+                yield item
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
+            response, upcoming = (await upcoming if upcoming else None), None
+    finally:
+        if upcoming is not None:
+            upcoming.cancel()
+
+
+async def collect(session, kind, sort='trendingScore', max_items=None):
+    """Listing as a {page url: item} dict; API errors are logged and end the walk"""
+    items = {}
+    try:
+        async for item in iter_listing(session, kind, sort=sort, max_items=max_items):
+            items[item['model_url']] = item
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"[ERROR] Hugging Face {kind} listing failed after {len(items)} items: {e}")
+    return items
+
+
+async def main(kinds, max_items):
+    async with create_session() as session:
+        listings = await asyncio.gather(*(collect(session, kind, max_items=max_items) for kind in kinds))
+    for kind, items in zip(kinds, listings):
+        print(f"[INFO] {kind}: {len(items)} items")
+        for item in list(items.values())[:5]:
+            print(f"    {item}")
+
+
+if __name__ == "__main__":
+    # python hfapi.py [max items per kind] [models spaces datasets]
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    asyncio.run(main(sys.argv[2:] or list(KINDS), limit))
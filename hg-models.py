@@ -2,16 +2,20 @@ import os
 import requests
 import asyncio
 from aiohttp import ClientSession, ClientTimeout
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import re
 import aiohttp
+from sitemap import traverse_sitemaps
+from robots import robots
+from extract import Extractor, parse_count
 from collect_data_wayback import collect_data_wayback,exact_url_timestamp
 from waybackpy import WaybackMachineCDXServerAPI
 import cdx_toolkit
 from domainLatestUrl import DomainMonitor
-from hgModelPopular import bulk_scrape_and_save_model_urls
+from hfapi import collect
+from httpcache import http_cache
+from transport import create_session, host_slots
 # Load environment variables
 load_dotenv()
 
@@ -27,43 +31,45 @@ HEADERS = {
 }
 ccisopen=False
 
-# Concurrency limit
-SEM_LIMIT = 20
+# Listing API sweeps: the most liked models (their like counts then need no page
+# fetch) and the trending snapshot
+HF_LISTING_LIMIT = int(os.getenv('HF_LISTING_LIMIT', 50000))
+HF_TRENDING_LIMIT = 10
 
-# Helper: Parse a sitemap and return all <loc> URLs
-async def parse_sitemap(session, url):
-    try:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "xml")
-            return [loc.text for loc in soup.find_all("loc")]
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch sitemap {url}: {e}")
-        return []
+# Like-count button next to the repo name
+LIKE_COUNT = Extractor.by_class("button", "flex items-center border-l px-1.5 py-1 text-gray-400 hover:bg-gray-50 focus:bg-gray-100 focus:outline-none dark:hover:bg-gray-900 dark:focus:bg-gray-800")
 
 # Helper: Fetch model page and extract run count
 async def get_model_runs(session, item):
     try:
         url=item.get('model_url')
+        if not await robots.can_fetch(session, url):
+            print(f"[INFO] Disallowed by robots.txt: {url}")
+            item['run_count']=0
+            return item
+        await robots.wait(session, url)
         # https://huggingface.co/models/AP123/IllusionDiffusion/discussions/94
-        async with session.get(url) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            run_span = soup.find("button", class_="flex items-center border-l px-1.5 py-1 text-gray-400 hover:bg-gray-50 focus:bg-gray-100 focus:outline-none dark:hover:bg-gray-900 dark:focus:bg-gray-800")
-            if run_span:
-                t = run_span.get_text(strip=True).lower()
-                if 'k' in t:
-                    t = int(float(t.replace('k', '')) * 1000)
-                elif 'm' in t:
-                    t = int(float(t.replace('m', '')) * 1000000)
-                t = re.search(r'\d+', str(t)).group(0)
-                item['run_count']=t
-                return item
+        async with host_slots(url):
+            if http_cache.worth_caching(url):
+                page = await http_cache.fetch(session, url)
+                item['digest'] = page.digest
+                if page.unchanged:
+                    item['unchanged'] = True
+                    return item
+                run_text = LIKE_COUNT.first_text(page.text())
             else:
-                print(f"[WARNING] No run count found on page: {url}")
-                item['run_count']=0
-                
-                return item
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    run_text = await LIKE_COUNT.first_text_streamed(response)
+        run_count = parse_count(run_text)
+        if run_count is not None:
+            item['run_count']=run_count
+            return item
+        else:
+            print(f"[WARNING] No run count found on page: {url}")
+            item['run_count']=0
+            
+            return item
     except Exception as e:
         print(f"[ERROR] Failed to fetch model page {url}: {e}")
         item['run_count']=0
@@ -213,10 +219,10 @@ async def upsert_model_data(session,item, max_retries=3, retry_delay=5):
 
     for attempt in range(max_retries):
         try:
-            async with session.post(url, headers=HEADERS, json=payload) as response:
+            async with host_slots(url), session.post(url, headers=HEADERS, json=payload) as response:
                 response.raise_for_status()
                 print(f"[INFO] Data upserted for {model_url} with {run_count} runs.")
-                return
+                return True
         except aiohttp.ClientError as e:
             print(f"[ERROR] Attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
@@ -228,32 +234,42 @@ async def upsert_model_data(session,item, max_retries=3, retry_delay=5):
                 print(f"[INFO] Retrying in {retry_delay} seconds...")
                 await asyncio.sleep(retry_delay)
     print(f"[ERROR] Failed to upsert data for {model_url} after {max_retries} attempts.")
+    return False
 
 # Process a single model URL
-async def process_model_url(semaphore, session, item):
-    async with semaphore:
-        model_url=item.get("model_url")
-        print(f"[INFO] Processing model: {model_url}")
+async def process_model_url(session, item, listing=None):
+    model_url=item.get("model_url")
+    print(f"[INFO] Processing model: {model_url}")
+    if listing and model_url in listing:
+        item['run_count'] = listing[model_url].get('likes') or 0
+    else:
         item = await get_model_runs(session, item)
-        print(f"[INFO] save statics: {item}")
-        
-        if item is not None:
-            await upsert_model_data(session, item)
-async def process_popular_model(semaphore, session, item):
-    async with semaphore:
-        await upsert_model_data(session, item)
+    if item.get('unchanged'):
+        print(f"[INFO] Page unchanged since the last save: {model_url}")
+        return
+    print(f"[INFO] save statics: {item}")
+    
+    if item is not None:
+        if await upsert_model_data(session, item):
+            http_cache.remember_digest(model_url, item.get('digest'))
+async def process_popular_model(session, item):
+    await upsert_model_data(session, item)
 
 # Main function
 async def main():
-    semaphore = asyncio.Semaphore(SEM_LIMIT)
     timeout = ClientTimeout(total=60)
     supportsitemap=False
     supportgooglesearch=True
     baseUrl='https://huggingface.co/models/'
     
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with create_session(timeout=timeout) as session:
         print("[INFO] Starting sitemap parsing...")
         await create_table_if_not_exists(session)
+        listing, trending = await asyncio.gather(
+            collect(session, 'models', sort='likes', max_items=HF_LISTING_LIMIT),
+            collect(session, 'models', sort='trendingScore', max_items=HF_TRENDING_LIMIT),
+        )
+        print(f"[INFO] listing API: {len(listing)} liked, {len(trending)} trending models")
         is_populated = await is_table_populated(session)
         
         if is_populated==False:
@@ -317,7 +333,7 @@ async def main():
             cleanitems = list(unique_items.values())
 
             print('cleanitems',len(cleanitems))
-            await asyncio.gather(*(process_model_url(semaphore, session, item) for item in cleanitems))
+            await asyncio.gather(*(process_model_url(session, item, listing) for item in cleanitems))
         modelurls=[]
         existing_models=await get_existing_model_data()
         print('existing models count',len(existing_models))
@@ -327,14 +343,14 @@ async def main():
         if supportsitemap:
             url_domain = 'https://huggingface.co'
             ROOT_SITEMAP_URL = f"{url_domain}/sitemap.xml"
-            new_models = await parse_sitemap(session, ROOT_SITEMAP_URL)
+            new_models = [loc async for loc, _ in traverse_sitemaps(session, ROOT_SITEMAP_URL, include=[r'models'], robots=robots)]
             print("[INFO] Sitemap parsing complete.")
             # model_urls = list(set(model_urls))
             
         if supportgooglesearch:
             d=DomainMonitor()
             search_model_urls=[]
-            results=d.monitor_site(site=baseUrl,time_range='24h')
+            results=await d.monitor_site_async(site=baseUrl,time_range='24h')
             print('==',results)
             print("[INFO] google search check  complete.")
             new_models={}
@@ -360,15 +376,23 @@ async def main():
             print('clean google search url item',existing_models)
             
             
-            await asyncio.gather(*(process_model_url(semaphore, session, item) for item in existing_models))
+            await asyncio.gather(*(process_model_url(session, item, listing) for item in existing_models))
     
         print("[INFO] url detect complete.")
         print("[INFO] update popular model count.")
 
-        popularmodels=bulk_scrape_and_save_model_urls()[:10]
-        await asyncio.gather(*(process_popular_model(semaphore, session, item) for item in popularmodels))
+        popularmodels=[{'model_url': url, 'run_count': item.get('likes') or 0} for url, item in trending.items()]
+        if not popularmodels:
+            print("[WARNING] Trending listing API returned nothing, falling back to the browser")
+            from hgModelPopular import bulk_scrape_and_save_model_urls
+            popularmodels=bulk_scrape_and_save_model_urls()[:HF_TRENDING_LIMIT]
+        await asyncio.gather(*(process_popular_model(session, item) for item in popularmodels))
 
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        http_cache.report()
+        http_cache.close()
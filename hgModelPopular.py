@@ -3,7 +3,9 @@ import os
 import hashlib
 import concurrent.futures
 from DataRecorder import Recorder
-from getbrowser import setup_chrome
+from tabpool import TabPool
+from hgtrending import scrape_listing, stats
+from browsershards import BROWSER_SHARDS, scrape_sharded
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -14,8 +16,8 @@ CLOUDFLARE_API_TOKEN = os.getenv('CLOUDFLARE_API_TOKEN')
 
 CLOUDFLARE_BASE_URL = f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/d1/database/{D1_DATABASE_ID}"
 
-# Initialize Browser
-browser = setup_chrome()
+# Tabs on the shared browser, which starts with the first page scraped
+tabs = TabPool()
 
 def getcounts(url):
     """
@@ -23,22 +25,9 @@ def getcounts(url):
     """
     if url:
         try:
-            tab = browser.new_tab()
-            tab.get(url)
-            
-            # Extract app details
-            articles = tab.eles("t:article")
-            items = []
-            for a in articles:
-                model_url = "https://huggingface.co/models/" + a.ele('t:a').link
-                run_count = "https://huggingface.co/models/" + a.ele('t:a').eles("t:svg")[1].text
-                
-
-                item = {
-                    "model_url": model_url,
-                    "run_count": run_count
-                }
-                items.append(item)
+            with tabs.tab() as tab:
+                # Cards come from the page's listing JSON; the DOM is only the fallback
+                items = scrape_listing(tab, url, 'models')
             return items
         except Exception as e:
             print(f"Error fetching info for {url}: {e}")
@@ -55,12 +44,23 @@ def bulk_scrape_and_save_model_urls():
         url = f"https://huggingface.co/models?p={i}&sort=trending"
         urls.append(url)
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        results = list(executor.map(getcounts, urls))
+    # One thread per pooled tab; more would only queue for a tab
+    if BROWSER_SHARDS > 1:
+        # One browser per shard process, so page rendering scales with cores
+        results = scrape_sharded('hgModelPopular:getcounts', urls)
+    else:
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=tabs.size) as executor:
+                results = list(executor.map(getcounts, urls))
+        finally:
+            # Quits the browser unless another pool in this process still uses it
+            tabs.close()
         
     # Flatten the results and extend the total list
     for result in results:
         total.extend(result)
+    if BROWSER_SHARDS <= 1:
+        print(f"[INFO] Trending pages read from: {stats}")
 
     # Process the total list of items
     return total
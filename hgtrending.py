@@ -0,0 +1,90 @@
+import json
+from extract import parse_count
+
+HF_SITE = 'https://huggingface.co'
+# Seconds to wait for the listing XHR once the page's DOM is in
+LISTEN_TIMEOUT = 5
+
+# Per listing kind: the JSON endpoint the page pulls its cards from, the page URL of one
+# repo, and the card element holding the like count when falling back to the DOM
+LISTINGS = {
+    'models': {'json': '/models-json', 'url': HF_SITE + '/{id}', 'dom_count': None},
+    'spaces': {'json': '/spaces-json', 'url': HF_SITE + '/spaces/{id}', 'dom_count': '.text-white'},
+}
+
+# Where the cards of each page came from
+stats = {'xhr': 0, 'ssr': 0, 'dom': 0, 'empty': 0}
+
+
+def find_repos(data, kind):
+    """The list of repo dicts stored under the key `kind` anywhere in a JSON document"""
+    if isinstance(data, dict):
+        found = data.get(kind)
+        if isinstance(found, list) and found and isinstance(found[0], dict) and 'id' in found[0]:
+            return found
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        found = find_repos(child, kind)
+        if found:
+            return found
+    return None
+
+
+def items_from_json(data, kind):
+    repos = find_repos(data, kind) or []
+    url = LISTINGS[kind]['url']
+    return [{'model_url': url.format(id=repo['id']), 'run_count': repo.get('likes') or 0} for repo in repos]
+
+
+def items_from_props(tab, kind):
+    """Cards from the JSON the server renders into data-props for hydration"""
+    for element in tab.eles('css:[data-props]', timeout=0):
+        try:
+            items = items_from_json(json.loads(element.attr('data-props')), kind)
+        except (TypeError, ValueError):
+            continue
+        if items:
+            return items
+    return []
+
+
+def items_from_dom(tab, kind):
+    """Walk the rendered cards; many element queries, used when no JSON was found"""
+    items = []
+    dom_count = LISTINGS[kind]['dom_count']
+    for card in tab.eles('t:article'):
+        link = card.ele('t:a')
+        count = link.ele(dom_count).text if dom_count else card.text
+        items.append({'model_url': link.link, 'run_count': parse_count(count, last=True) or 0})
+    return items
+
+
+def scrape_listing(tab, url, kind):
+    """
+    Load a trending listing page and return its cards as
+    {'model_url', 'run_count'} dicts, reading them from the first source that
+    has them: the listing JSON the page fetches, the hydration JSON in the
+    page, then the DOM.
+    """
+    tab.listen.start(LISTINGS[kind]['json'])
+    try:
+        tab.get(url)
+        items = items_from_props(tab, kind)
+        if items:
+            stats['ssr'] += 1
+            return items
+        packet = tab.listen.wait(timeout=LISTEN_TIMEOUT)
+        if packet:
+            items = items_from_json(packet.response.body, kind)
+            if items:
+                stats['xhr'] += 1
+                return items
+    finally:
+        tab.listen.stop()
+    items = items_from_dom(tab, kind)
+    stats['dom' if items else 'empty'] += 1
+    return items
@@ -0,0 +1,253 @@
+import os
+import sys
+import time
+import zlib
+import hashlib
+import sqlite3
+import asyncio
+from urllib.parse import urlsplit
+from transport import create_session
+
+# HTTP_CACHE= (empty) turns the cache off; responses then stream straight from the network
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE', 'http-cache.sqlite')
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_MB', 512)) * 1024 * 1024
+# Eviction trims the cache down to this share of the limit, so it does not run on every store
+EVICT_TO = 0.9
+COMMIT_EVERY = 100
+
+
+class CachedResponse:
+    """A fully read response: `status` is the origin's, 304s are replayed as 200 from the cache"""
+
+    def __init__(self, url, status, content_type, body, from_cache, digest=None, unchanged=False):
+        self.url = url
+        self.status = status
+        self.content_type = content_type or ''
+        self.body = body
+        self.from_cache = from_cache
+        # Body fingerprint, and whether it equals the one remembered for this URL
+        self.digest = digest
+        self.unchanged = unchanged
+
+    @property
+    def charset(self):
+        for part in self.content_type.split(';')[1:]:
+            key, _, value = part.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"')
+        return None
+
+    def text(self):
+        return self.body.decode(self.charset or 'utf-8', errors='replace')
+
+
+class HttpCache:
+    """
+    On-disk cache of response bodies keyed by URL, stored zlib compressed in
+    SQLite with the ETag / Last-Modified they came with.
+
+    fetch() sends the stored validators as If-None-Match / If-Modified-Since;
+    a 304 is answered from disk. Responses without validators are not stored,
+    since they could never be revalidated. When the compressed bodies exceed
+    max_bytes the least recently used entries are dropped.
+
+    Every body fetched is also fingerprinted. remember_digest() records the
+    fingerprint once the caller has stored what it extracted, and the next
+    fetch() of an identical body comes back with unchanged=True so extraction
+    and the database write can be skipped. Digests are kept in their own table
+    and survive eviction.
+
+    Reading a body in full to store it costs the caller any early exit from a
+    streamed read, which only pays off where a 304 can come back later. Each
+    host is remembered as sending validators or not, by its latest response,
+    and worth_caching() is False for hosts known to send none.
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = None
+        self.total_bytes = 0
+        self._pending_writes = 0
+        self.validating_hosts = {}
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'bytes_saved': 0,
+                      'unchanged': 0, 'changed': 0}
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_type TEXT,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            self.conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS digests (url TEXT PRIMARY KEY, digest TEXT NOT NULL)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, validators INTEGER NOT NULL)')
+            self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            self.validating_hosts = {host: bool(v) for host, v in self.conn.execute('SELECT host, validators FROM hosts')}
+        return self.conn
+
+    def _wrote(self):
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def lookup(self, url):
+        """(etag, last_modified, content_type, body) stored for url, or None"""
+        row = self._connect().execute(
+            'SELECT etag, last_modified, content_type, body FROM responses WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_type, body = row
+        return etag, last_modified, content_type, zlib.decompress(body)
+
+    def touch(self, url):
+        self._connect().execute('UPDATE responses SET accessed = ? WHERE url = ?', (time.time(), url))
+        self._wrote()
+
+    def store(self, url, etag, last_modified, content_type, body):
+        conn = self._connect()
+        packed = zlib.compress(body, 6)
+        old = conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (url, etag, last_modified, content_type, body, size, accessed) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, etag, last_modified, content_type, packed, len(packed), time.time()),
+        )
+        self.total_bytes += len(packed) - (old[0] if old else 0)
+        self.stats['stored'] += 1
+        self._wrote()
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def worth_caching(self, url):
+        """Whether url should go through fetch(); unknown hosts get one try to show their headers"""
+        if not self.enabled:
+            return False
+        self._connect()
+        return self.validating_hosts.get(urlsplit(url).netloc, True)
+
+    def _saw_validators(self, url, sent):
+        host = urlsplit(url).netloc
+        if self.validating_hosts.get(host) != sent:
+            self.validating_hosts[host] = sent
+            self._connect().execute('INSERT OR REPLACE INTO hosts (host, validators) VALUES (?, ?)', (host, int(sent)))
+            self._wrote()
+
+    def remember_digest(self, url, digest):
+        """
+        Record the body digest whose extracted data has been saved. None (data that
+        did not come from the HTTP body) forgets the old digest, so the next fetch counts as changed
+        """
+        if not self.enabled:
+            return
+        if digest is None:
+            self._connect().execute('DELETE FROM digests WHERE url = ?', (url,))
+        else:
+            self._connect().execute('INSERT OR REPLACE INTO digests (url, digest) VALUES (?, ?)', (url, digest))
+        self._wrote()
+
+    def _compare_digest(self, url, body):
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        row = self._connect().execute('SELECT digest FROM digests WHERE url = ?', (url,)).fetchone()
+        unchanged = row is not None and row[0] == digest
+        self.stats['unchanged' if unchanged else 'changed'] += 1
+        return digest, unchanged
+
+    def evict(self):
+        """Drop least recently used entries until the cache is under EVICT_TO of its limit"""
+        target = self.max_bytes * EVICT_TO
+        doomed = []
+        for url, size in self.conn.execute('SELECT url, size FROM responses ORDER BY accessed'):
+            if self.total_bytes <= target:
+                break
+            doomed.append((url,))
+            self.total_bytes -= size
+        self.conn.executemany('DELETE FROM responses WHERE url = ?', doomed)
+        self.conn.commit()
+        self._pending_writes = 0
+        self.stats['evicted'] += len(doomed)
+
+    async def fetch(self, session, url, **kwargs):
+        """
+        GET url and read the whole body, revalidating a stored copy first.
+        Raises aiohttp.ClientResponseError for error statuses like raise_for_status().
+        """
+        cached = self.lookup(url) if self.enabled else None
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cached is not None:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        async with session.get(url, headers=headers, **kwargs) as response:
+            if response.status == 304 and cached is not None:
+                _, _, content_type, body = cached
+                self.stats['hits'] += 1
+                self.stats['bytes_saved'] += len(body)
+                self.touch(url)
+                return CachedResponse(url, 200, content_type, body, True, *self._compare_digest(url, body))
+            response.raise_for_status()
+            body = await response.read()
+            content_type = response.headers.get('Content-Type')
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        self.stats['misses'] += 1
+        if not self.enabled:
+            return CachedResponse(url, response.status, content_type, body, False)
+        self._saw_validators(url, bool(etag or last_modified))
+        if etag or last_modified:
+            self.store(url, etag, last_modified, content_type, body)
+        return CachedResponse(url, response.status, content_type, body, False, *self._compare_digest(url, body))
+
+    def report(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups if lookups else 0
+        compared = self.stats['unchanged'] + self.stats['changed']
+        match = self.stats['unchanged'] / compared if compared else 0
+        print(f"[INFO] HTTP cache: {self.stats}, hit rate {rate:.0%}, digest match rate {match:.0%}, "
+              f"{self.total_bytes / 1024 / 1024:.1f} MB on disk")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+# One cache per process, shared by every scraper in it
+http_cache = HttpCache()
+
+
+async def main(urls):
+    async with create_session() as session:
+        for round_ in (1, 2):
+            for url in urls:
+                started = time.perf_counter()
+                response = await http_cache.fetch(session, url)
+                print(f"round {round_} {url}: {len(response.body)} bytes, "
+                      f"{'cache' if response.from_cache else 'network'}, "
+                      f"{'unchanged' if response.unchanged else 'changed'}, {time.perf_counter() - started:.2f}s")
+                http_cache.remember_digest(url, response.digest)
+    http_cache.report()
+    http_cache.close()
+
+
+if __name__ == "__main__":
+    # python httpcache.py url ... (fetches every URL twice, the second round revalidates)
+    asyncio.run(main(sys.argv[1:]))
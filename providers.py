@@ -0,0 +1,95 @@
+import re
+from extract import Extractor, class_xpath, parse_count
+from civitaiapi import collect_stats as civitai_api_stats, USE_CIVITAI_API
+from replicateapi import collect_runs as replicate_api_runs
+
+def replicate_runs(text):
+    # 'Public1.2M runs' - only the number in front of 'runs'
+    return parse_count(text.lower().split('runs')[0])
+
+
+def falai_model_url(url):
+    # The sitemap lists /api, /examples and /edit subpages of each model
+    url = url.replace('/api', '')
+    url = url.replace('/examples', '')
+    url = url.replace('/edit', '')
+    if '/models/' not in url:
+        return None
+    return url
+
+
+CIVITAI_MODEL_PATTERN = re.compile(r'^https://civitai\.com/models/(\d+)')
+
+
+def civitai_model_id(url):
+    # /models/4201/realistic-vision and the API's /models/4201 are the same model
+    match = CIVITAI_MODEL_PATTERN.match(url)
+    return match.group(1) if match else None
+
+
+# Download/run badges in the second row of civitai's model details table
+CIVITAI_STAT_ROWS = ("tr", "mantine-1avyp1d")
+CIVITAI_STAT_BADGE = ("span", "mantine-h9iq4m mantine-Badge-inner")
+
+# Every provider is plain data:
+#   sitemap / include   discovery: root sitemap and the child sitemaps to walk
+#   clean_url           optional: map a sitemap URL onto its model page, None to skip it
+#   extractor           element(s) holding the numbers on a model page
+#   normalize           text of one element -> int
+#   table / columns     D1 table and the integer column each extracted number goes to
+#   extra               constant TEXT columns stored with every row
+#   state_file          optional: enables lastmod-driven incremental refresh
+#   collector           optional: async generator of (model_url, counts) from a bulk API,
+#                       used instead of the sitemap crawl unless SITEMAP_ONLY=1
+#   collector_key       optional: model id of a URL; collector rows are then stored under the
+#                       sitemap URL with the same id, the key existing rows were written with
+#   sitemap_fallback    optional: after the collector, still crawl sitemap URLs it did not cover
+PROVIDERS = {
+    'replicate': {
+        'sitemap': "https://replicate.com/sitemap.xml",
+        'include': [r'/sitemap-models\.xml$'],
+        'collector': replicate_api_runs,
+        'sitemap_fallback': True,
+        'extractor': Extractor.by_class("ul", "mt-3 flex gap-4 items-center flex-wrap"),
+        'normalize': replicate_runs,
+        'table': 'replicate_model_data',
+        'columns': ['run_count'],
+        'state_file': 'replicate.state.json',
+    },
+    'civitai': {
+        'sitemap': "https://civitai.com/sitemap.xml",
+        'include': [r'/sitemap-models\.xml$'],
+        # The API has no run counts, so it is only used with CIVITAI_API=1
+        'collector': civitai_api_stats if USE_CIVITAI_API else None,
+        'collector_key': civitai_model_id,
+        'extractor': Extractor(
+            f"({class_xpath(*CIVITAI_STAT_ROWS)})[2]{class_xpath(*CIVITAI_STAT_BADGE)}",
+            lambda soup: [span for row in soup.find_all(CIVITAI_STAT_ROWS[0], class_=CIVITAI_STAT_ROWS[1])[1:2]
+                          for span in row.find_all(CIVITAI_STAT_BADGE[0], class_=CIVITAI_STAT_BADGE[1])],
+        ),
+        'normalize': parse_count,
+        'table': 'civitai_model_data',
+        'columns': ['download_count', 'run_count'],
+        'extra': {'type': 'models'},
+        'state_file': 'civitai.state.json',
+    },
+    'aimodelsfyi': {
+        'sitemap': "https://www.aimodels.fyi/sitemap.xml",
+        'include': [r'/sitemap-0\.xml$'],
+        'clean_url': lambda url: url if '/models/' in url else None,
+        # https://www.aimodels.fyi/models/huggingFace/flux.1-dev-black-forest-labs
+        'extractor': Extractor.by_class("div", "css-19dcitr"),
+        'normalize': parse_count,
+        'table': 'aimodelsfyi_model_data',
+        'columns': ['run_count'],
+    },
+    'falai': {
+        'sitemap': "https://fal.ai/sitemap.xml",
+        'include': [r'/sitemap-0\.xml$'],
+        'clean_url': falai_model_url,
+        'extractor': Extractor.by_class("ul", "mt-3 flex gap-4 items-center flex-wrap"),
+        'normalize': replicate_runs,
+        'table': 'falai_model_data',
+        'columns': ['run_count'],
+    },
+}
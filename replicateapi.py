@@ -0,0 +1,76 @@
+import os
+import sys
+import asyncio
+import aiohttp
+from transport import create_session
+
+# Point at a local stand-in server with REPLICATE_API_BASE=http://127.0.0.1:8000/v1
+REPLICATE_API_BASE = os.getenv('REPLICATE_API_BASE', 'https://api.replicate.com/v1')
+REPLICATE_API_TOKEN = os.getenv('REPLICATE_API_TOKEN')
+REPLICATE_SITE = 'https://replicate.com'
+
+
+async def _fetch_page(session, url, headers):
+    async with session.get(url, headers=headers) as response:
+        response.raise_for_status()
+        return await response.json()
+
+
+async def iter_models(session, max_items=None):
+    """
+    Yield one model dict per public model from the Replicate models API.
+
+    Pages are chained through the `next` cursor URL. As soon as a page is
+    decoded the request for the following one goes out, so it downloads
+    while this page is consumed; at most one page is in flight ahead.
+    """
+    headers = {'Authorization': f"Bearer {REPLICATE_API_TOKEN}"}
+    upcoming = asyncio.create_task(_fetch_page(session, f"{REPLICATE_API_BASE}/models", headers))
+    count = 0
+    try:
+        while upcoming is not None:
+            page = await upcoming
+            upcoming = None
+            if page.get('next') and (max_items is None or count + len(page['results']) < max_items):
+                upcoming = asyncio.create_task(_fetch_page(session, page['next'], headers))
+            for model in page.get('results', []):
+                yield model
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
+    finally:
+        if upcoming is not None:
+            upcoming.cancel()
+
+
+def model_url(model):
+    return model.get('url') or f"{REPLICATE_SITE}/{model['owner']}/{model['name']}"
+
+
+async def collect_runs(session):
+    """(model page url, [run_count]) per model the API lists; errors end the walk early"""
+    if not REPLICATE_API_TOKEN:
+        print("[WARNING] REPLICATE_API_TOKEN is not set, skipping the models API")
+        return
+    count = 0
+    try:
+        async for model in iter_models(session):
+            if model.get('run_count') is None:
+                continue
+            count += 1
+            yield model_url(model), [model['run_count']]
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"[ERROR] Replicate models listing failed after {count} models: {e}")
+
+
+async def main(max_items):
+    async with create_session() as session:
+        models = [m async for m in iter_models(session, max_items=max_items)]
+    print(f"[INFO] {len(models)} models")
+    for model in models[:5]:
+        print(f"    {model_url(model)} {model.get('run_count')}")
+
+
+if __name__ == "__main__":
+    # python replicateapi.py [max models]
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
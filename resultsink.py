@@ -0,0 +1,81 @@
+import os
+import csv
+import json
+from collections import Counter
+
+# Columns of a search result row, in file order
+RESULT_FIELDS = ['site', 'time_range', 'title', 'url', 'game_name', 'date', 'timestamp']
+
+
+class ResultSink:
+    """
+    Append-only output for search results: rows go to disk as each results
+    page is parsed and are flushed straight away, so a run that dies keeps
+    everything written so far; in memory it only keeps the range each URL
+    was filed under.
+
+    The format follows the extension: .jsonl writes one JSON object per
+    line, anything else CSV. An existing file is appended to. The summary
+    counts are updated row by row instead of being computed at the end.
+
+    A site's URL may be written again under another time range; the summary
+    counts it once, under the range of its latest row.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.endswith('.jsonl')
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        # utf-8-sig puts the BOM Excel wants at the start of a new file only
+        self.file = open(path, 'a', encoding='utf-8' if self.jsonl else 'utf-8-sig', newline='')
+        self.writer = None
+        if not self.jsonl:
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+            if fresh:
+                self.writer.writeheader()
+        self.total = 0
+        self.sites = Counter()
+        self.time_ranges = Counter()
+        self.newest = {}
+        self.filed = {}
+
+    def write(self, rows):
+        for row in rows:
+            if self.jsonl:
+                self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            else:
+                self.writer.writerow(row)
+            key = (row['site'], row['url'])
+            if key in self.filed:
+                self.time_ranges[self.filed[key]] -= 1
+            else:
+                self.total += 1
+                self.sites[row['site']] += 1
+            self.filed[key] = row['time_range']
+            self.time_ranges[row['time_range']] += 1
+            if row.get('date') and row['date'] > self.newest.get(row['site'], ''):
+                self.newest[row['site']] = row['date']
+        self.file.flush()
+
+    def summary(self):
+        return {
+            'total': self.total,
+            'sites': dict(self.sites),
+            'time_ranges': {r: count for r, count in self.time_ranges.items() if count},
+            'newest': dict(self.newest),
+        }
+
+    def report(self):
+        print("\n=== 监控统计 ===")
+        print(f"总计发现新页面: {self.total}")
+        print("\n按网站统计:")
+        for site, count in self.sites.most_common():
+            print(f"{site}: {count} (newest {self.newest.get(site, '-')})")
+        print("\n按时间范围统计:")
+        for time_range, count in self.time_ranges.most_common():
+            if count:
+                print(f"{time_range}: {count}")
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
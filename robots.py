@@ -0,0 +1,196 @@
+import re
+import sys
+import time
+import asyncio
+from urllib.parse import urlsplit
+import aiohttp
+
+# How long a host's robots.txt is trusted before it is fetched again
+ROBOTS_TTL = 24 * 3600
+# Retry sooner when robots.txt could not be read (5xx / network error)
+ROBOTS_ERROR_TTL = 600
+ROBOTS_USER_AGENT = '*'
+
+
+def _rule_regex(pattern):
+    """robots.txt path pattern -> regex source ('*' wildcard, trailing '$' anchor)"""
+    anchored = pattern.endswith('$')
+    if anchored:
+        pattern = pattern[:-1]
+    source = '.*'.join(re.escape(part) for part in pattern.split('*'))
+    return source + ('$' if anchored else '')
+
+
+class RobotsRules:
+    """
+    The rules of one robots.txt for one user agent.
+
+    All Allow/Disallow lines are compiled into a single regex whose
+    alternatives are ordered most specific first (allow before disallow on a
+    tie), so one match call gives the RFC 9309 longest-match verdict.
+    """
+
+    def __init__(self, text='', user_agent=ROBOTS_USER_AGENT, allow_all=False, disallow_all=False):
+        self.crawl_delay = None
+        self.sitemaps = []
+        self._matcher = None
+        self._verdicts = []
+        self._disallow_all = disallow_all
+        if not allow_all and not disallow_all:
+            self._parse(text, user_agent.lower())
+
+    def _parse(self, text, user_agent):
+        groups = []  # (agents, rules, crawl_delay)
+        current = None
+        in_agents = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            key, value = key.strip().lower(), value.strip()
+            if key == 'sitemap':
+                self.sitemaps.append(value)
+            elif key == 'user-agent':
+                if not in_agents:
+                    current = [[], [], None]
+                    groups.append(current)
+                current[0].append(value.lower())
+                in_agents = True
+            elif current is not None and key in ('allow', 'disallow'):
+                in_agents = False
+                if value:
+                    current[1].append((value, key == 'allow'))
+            elif current is not None and key == 'crawl-delay':
+                in_agents = False
+                try:
+                    current[2] = float(value)
+                except ValueError:
+                    pass
+
+        # The most specific matching agent group wins, '*' is the fallback
+        chosen = [g for g in groups if user_agent != '*' and any(a != '*' and a in user_agent for a in g[0])]
+        if not chosen:
+            chosen = [g for g in groups if '*' in g[0]]
+        rules = [rule for g in chosen for rule in g[1]]
+        delays = [g[2] for g in chosen if g[2] is not None]
+        self.crawl_delay = max(delays) if delays else None
+
+        if rules:
+            rules.sort(key=lambda r: (-len(r[0]), not r[1]))
+            self._verdicts = [allowed for _, allowed in rules]
+            self._matcher = re.compile('|'.join(f'({_rule_regex(p)})' for p, _ in rules))
+
+    def allowed(self, url):
+        if self._disallow_all:
+            return False
+        if self._matcher is None:
+            return True
+        parts = urlsplit(url)
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        match = self._matcher.match(path)
+        if match is None:
+            return True
+        return self._verdicts[match.lastindex - 1]
+
+
+class RobotsCache:
+    """
+    Per-host robots.txt cache shared by every crawler in the process.
+
+    ensure() fetches a host's robots.txt at most once per TTL (concurrent
+    callers wait on the same fetch); after that allowed(), delay() and
+    sitemaps() are plain dict lookups. wait() spaces requests to a host by
+    its Crawl-delay.
+    """
+
+    def __init__(self, user_agent=ROBOTS_USER_AGENT, ttl=ROBOTS_TTL):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self._rules = {}  # host -> (RobotsRules, expires_at)
+        self._locks = {}
+        self._next_slot = {}
+
+    @staticmethod
+    def _host(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    async def ensure(self, session, url):
+        host = self._host(url)
+        cached = self._rules.get(host)
+        if cached and cached[1] > time.time():
+            return cached[0]
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            cached = self._rules.get(host)
+            if cached and cached[1] > time.time():
+                return cached[0]
+            rules, ttl = await self._fetch(session, host)
+            self._rules[host] = (rules, time.time() + ttl)
+            return rules
+
+    async def _fetch(self, session, host):
+        robots_url = f"{host}/robots.txt"
+        try:
+            async with session.get(robots_url) as response:
+                if response.status >= 500:
+                    print(f"[WARNING] {robots_url} returned {response.status}, pausing host")
+                    return RobotsRules(disallow_all=True), ROBOTS_ERROR_TTL
+                if response.status >= 400:
+                    return RobotsRules(allow_all=True), self.ttl
+                text = await response.text(errors='replace')
+                return RobotsRules(text, self.user_agent), self.ttl
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[WARNING] Failed to fetch {robots_url}: {e}")
+            return RobotsRules(disallow_all=True), ROBOTS_ERROR_TTL
+
+    def load(self, host, text):
+        """Seed the cache with a robots.txt we already have (e.g. civitai.robots)"""
+        self._rules[self._host(host)] = (RobotsRules(text, self.user_agent), time.time() + self.ttl)
+
+    def _cached(self, url):
+        cached = self._rules.get(self._host(url))
+        return cached[0] if cached else None
+
+    def allowed(self, url):
+        rules = self._cached(url)
+        return True if rules is None else rules.allowed(url)
+
+    def delay(self, url):
+        rules = self._cached(url)
+        return rules.crawl_delay if rules else None
+
+    def sitemaps(self, url):
+        rules = self._cached(url)
+        return list(rules.sitemaps) if rules else []
+
+    async def can_fetch(self, session, url):
+        rules = await self.ensure(session, url)
+        return rules.allowed(url)
+
+    async def wait(self, session, url):
+        """Sleep until this host's Crawl-delay allows the next request"""
+        rules = await self.ensure(session, url)
+        if not rules.crawl_delay:
+            return
+        host = self._host(url)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + rules.crawl_delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# Shared instance, like the per-script semaphores
+robots = RobotsCache()
+
+
+if __name__ == "__main__":
+    # python robots.py civitai.robots https://civitai.com/models/1 https://civitai.com/api/v1/models
+    with open(sys.argv[1], encoding='utf8') as f:
+        rules = RobotsRules(f.read())
+    print(f"crawl-delay: {rules.crawl_delay}, sitemaps: {rules.sitemaps}")
+    for url in sys.argv[2:]:
+        print(f"{'allow   ' if rules.allowed(url) else 'disallow'} {url}")
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import sqlite3
+
+# SERP_CACHE= (empty) turns the cache off and every results page is loaded again
+SERP_CACHE_PATH = os.getenv('SERP_CACHE', 'serp-cache.sqlite')
+# Seconds a cached results page stays usable per time range; narrow ranges change faster
+SERP_TTLS = {
+    '24h': 3600,
+    '1w': 6 * 3600,
+    '1m': 24 * 3600,
+    '1y': 3 * 24 * 3600,
+    'all': 7 * 24 * 3600,
+}
+
+
+class SerpCache:
+    """
+    Parsed search results pages keyed by (query, tbs, start), stored as JSON
+    in SQLite together with the total result count the page showed.
+
+    lookup() only returns pages younger than the max_age it is given, which
+    the caller takes from SERP_TTLS for the range the page will be used for.
+    """
+
+    def __init__(self, path=SERP_CACHE_PATH):
+        self.path = path
+        self.conn = None
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0}
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS serp_pages (
+                    query TEXT NOT NULL,
+                    tbs TEXT NOT NULL,
+                    start INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    total INTEGER,
+                    fetched REAL NOT NULL,
+                    PRIMARY KEY (query, tbs, start)
+                )
+            """)
+        return self.conn
+
+    def lookup(self, query, tbs, start, max_age):
+        """(results, total) cached for the page if it is at most max_age seconds old, else None"""
+        if not self.enabled:
+            return None
+        row = self._connect().execute(
+            'SELECT results, total FROM serp_pages WHERE query = ? AND tbs = ? AND start = ? AND fetched >= ?',
+            (query, tbs, start, time.time() - max_age)).fetchone()
+        self.stats['hits' if row else 'misses'] += 1
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def store(self, query, tbs, start, results, total):
+        # No results and no result count is more likely a CAPTCHA or consent page than an answer
+        if not self.enabled or (not results and total is None):
+            return
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO serp_pages (query, tbs, start, results, total, fetched) VALUES (?, ?, ?, ?, ?, ?)',
+            (query, tbs, start, json.dumps(results, ensure_ascii=False), total, time.time()))
+        # Pages arrive seconds apart, so each one is committed straight away
+        conn.commit()
+        self.stats['stored'] += 1
+
+    def report(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups if lookups else 0
+        print(f"[INFO] SERP cache: {self.stats}, hit rate {rate:.0%}")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# One cache per process, shared by every DomainMonitor in it
+serp_cache = SerpCache()
@@ -0,0 +1,186 @@
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from bs4 import BeautifulSoup
+from extract import class_xpath
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # BeautifulSoup only
+    etree = lxml_html = None
+
+# Set SERP_PARSER_BACKEND=bs4 to force the html.parser path
+BACKEND = os.getenv('SERP_PARSER_BACKEND', 'lxml' if lxml_html is not None else 'bs4')
+
+RESULT_COUNT = re.compile(r'([\d,]+) results')
+# Dates Google prints in front of a result's snippet
+RELATIVE_DATE = re.compile(r'\b(\d+)\s+(minute|hour|day|week)s?\s+ago\b')
+ABSOLUTE_DATE = re.compile(r'\b([A-Z][a-z]{2} \d{1,2}, \d{4})\b')
+# Marks around a game's name in a title, tried in this order
+GAME_NAME_PATTERNS = [
+    re.compile(r'《(.+?)》'),       # 中文书名号
+    re.compile(r'["“](.+?)["”]'),  # 英文引号, straight or curly
+    re.compile(r'【(.+?)】'),       # 中文方括号
+    re.compile(r'\[(.+?)\]'),      # 英文方括号
+]
+TITLE_NOISE = re.compile(r'攻略|评测|资讯|下载|官网|专区|合集|手游|网游|页游|主机游戏|单机游戏')
+
+if etree is not None:
+    STATS_XPATH = etree.XPath('//*[@id="result-stats"]')
+    # Innermost div.g only; Google wraps some results in an outer div.g
+    RESULT_XPATH = etree.XPath(class_xpath('div', 'g') + '[not(.' + class_xpath('div', 'g') + ')]')
+    TITLE_XPATH = etree.XPath('(.//h3)[1]')
+    # The link wrapping the title, else the first link of the result
+    TITLE_LINK_XPATH = etree.XPath('ancestor::a[@href][1]')
+    LINK_XPATH = etree.XPath('(.//a[@href])[1]')
+
+
+def game_name(title):
+    """
+    从标题中提取可能的游戏名称
+    :return: the marked name, else the title without common channel words
+    """
+    for pattern in GAME_NAME_PATTERNS:
+        match = pattern.search(title)
+        if match:
+            return match.group(1)
+    return TITLE_NOISE.sub('', title).strip()
+
+
+def result_date(text, now=None):
+    """
+    Publication date shown with a search result
+    :param text: text of the result block
+    :return: 'YYYY-MM-DD HH:MM:SS' or None when the result shows no date
+    """
+    match = RELATIVE_DATE.search(text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2) + 's'
+        return ((now or datetime.now()) - timedelta(**{unit: amount})).strftime('%Y-%m-%d %H:%M:%S')
+    match = ABSOLUTE_DATE.search(text)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%b %d, %Y').strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    return None
+
+
+def result_count(text):
+    match = RESULT_COUNT.search(text or '')
+    return int(match.group(1).replace(',', '')) if match else None
+
+
+def make_result(title, url, text, now):
+    return {'title': title, 'url': url, 'game_name': game_name(title), 'date': result_date(text, now)}
+
+
+def _parse_lxml(html, now):
+    tree = lxml_html.fromstring(html)
+    stats = STATS_XPATH(tree)
+    total = result_count(stats[0].text_content()) if stats else None
+    results = []
+    for block in RESULT_XPATH(tree):
+        title = TITLE_XPATH(block)
+        link = (TITLE_LINK_XPATH(title[0]) if title else None) or LINK_XPATH(block)
+        if title and link:
+            results.append(make_result(title[0].text_content(), link[0].get('href'), ' '.join(block.itertext()), now))
+    return total, results
+
+
+def _parse_bs4(html, now):
+    soup = BeautifulSoup(html, 'html.parser')
+    stats = soup.select_one('#result-stats')
+    total = result_count(stats.get_text()) if stats else None
+    results = []
+    for block in soup.select('div.g'):
+        if block.select_one('div.g'):
+            continue
+        title = block.select_one('h3')
+        link = (title.find_parent('a', href=True) if title else None) or block.select_one('a[href]')
+        if title and link:
+            results.append(make_result(title.get_text(), link['href'], block.get_text(' '), now))
+    return total, results
+
+
+def parse_serp(html, now=None):
+    """
+    Parse a Google results page once
+    :return: (total result count or None, [{'title', 'url', 'game_name', 'date'}])
+    """
+    now = now or datetime.now()
+    if BACKEND == 'lxml' and lxml_html is not None:
+        try:
+            return _parse_lxml(html, now)
+        except (etree.ParserError, ValueError):
+            pass
+    return _parse_bs4(html, now)
+
+
+# Benchmark pages: saved ones (SERP_SAVE_DIR in domainLatestUrl), or built here
+def build_fixture_page(site, count, stats, first_id=0):
+    """A results page in Google's markup: #result-stats, div.g blocks with a > h3 and date spans"""
+    dates = ['<span>{n} hours ago</span> — ', '<span>{n} days ago</span> — ', '<span>Oct {n}, 2025</span> — ', '']
+    blocks = []
+    for i in range(first_id, first_id + count):
+        date = dates[i % len(dates)].format(n=i % 20 + 1)
+        block = (
+            f'<div class="g Ww4FFb vt6azd tF2Cxc asEBEc"><div class="yuRUbf"><span>'
+            f'<a jsname="UWckNb" href="https://{site}/app/game-{i}"><br><h3 class="LC20lb MBeuO DKV0Md">'
+            f'{["《", "“", "【", "["][i % 4]}Game {i}{["》", "”", "】", "]"][i % 4]} 攻略 - {site}</h3>'
+            f'<cite class="qLRx3b tjvcx">{site}<span> › game-{i}</span></cite></a></span></div>'
+            f'<div class="VwiC3b yXK7lf"><span class="LEwnzc Sqrs4e">{date}</span>'
+            f'<span>Play Game {i} now: tips, reviews and the latest updates for game {i}.</span></div></div>'
+        )
+        # Google wraps some results in an outer div.g
+        blocks.append(f'<div class="g"><div>{block}</div></div>' if i % 25 == 0 else block)
+    return (
+        f'<!doctype html><html><head><title>site:{site} - Google Search</title></head><body>'
+        f'<div id="appbar"><div id="result-stats">{stats}<nobr> (0.31 seconds)</nobr></div></div>'
+        f'<div id="search"><div id="rso">{"".join(blocks)}</div></div></body></html>'
+    )
+
+
+def build_fixture_pages():
+    return [
+        build_fixture_page('apps.apple.com', 100, 'About 1,240 results'),
+        build_fixture_page('apps.apple.com', 100, 'Page 2 of about 1,240 results', first_id=100),
+        build_fixture_page('play.google.com', 12, 'Page 6 of about 512 results'),
+        build_fixture_page('example.org', 0, ''),
+    ]
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+
+def benchmark(pages, rounds=20):
+    """Pages per second for each backend; both must find the same results"""
+    global BACKEND
+    found = {}
+    for backend in ('lxml', 'bs4'):
+        if backend == 'lxml' and lxml_html is None:
+            print("lxml not installed, skipping")
+            continue
+        BACKEND = backend
+        started = time.perf_counter()
+        for _ in range(rounds):
+            parsed = [parse_serp(page) for page in pages]
+        rate = rounds * len(pages) / (time.perf_counter() - started)
+        found[backend] = [(total, [r['url'] for r in results]) for total, results in parsed]
+        print(f"{backend:<5} {rate:8.1f} pages/s  {sum(len(urls) for _, urls in found[backend])} results")
+    if len(found) == 2 and found['lxml'] != found['bs4']:
+        print("[WARNING] lxml and bs4 disagree on the results")
+
+
+if __name__ == "__main__":
+    # python serpparse.py [saved_serp.html ...] (defaults to pages built by build_fixture_pages)
+    pages = load_pages(sys.argv[1:]) if len(sys.argv) > 1 else build_fixture_pages()
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / len(pages) / 1024:.0f} KB average")
+    benchmark(pages)
@@ -0,0 +1,358 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import gzip
+import asyncio
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import date
+import aiohttp
+from transport import HostSlots
+
+# Sitemaps are read in chunks of this size straight off the socket
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+# Child sitemaps fetched at the same time from one host while traversing
+SITEMAPS_PER_HOST = 4
+# Leaf URLs buffered between the traversal and the scrape queue
+LEAF_QUEUE_SIZE = 10000
+# Unchanged URLs are still re-fetched once every this many days (0 disables)
+FULL_REFRESH_DAYS = 30
+
+
+def _local_name(tag):
+    """Strip the '{namespace}' prefix ElementTree puts on every tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapStreamParser:
+    """
+    Incremental sitemap reader.
+
+    Feed it raw response bytes as they arrive (plain XML or .xml.gz, detected
+    from the first bytes) and it hands back the (loc, lastmod) pairs completed
+    so far. Finished <url>/<sitemap> entries are dropped from the tree right
+    away, so memory stays flat no matter how big the sitemap is.
+    """
+
+    def __init__(self):
+        self.kind = None  # 'urlset' or 'sitemapindex', known after the root tag
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._inflater = None
+        self._sniffed = False
+        self._head = b''
+        self._root = None
+
+    def feed(self, chunk):
+        if not self._sniffed:
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return []
+            chunk, self._head, self._sniffed = self._head, b'', True
+            if chunk.startswith(GZIP_MAGIC):
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflater is None:
+            self._parser.feed(chunk)
+            return self._drain()
+        # Inflate in bounded slices; sitemaps compress 20-30x
+        entries = []
+        while chunk:
+            self._parser.feed(self._inflater.decompress(chunk, CHUNK_SIZE))
+            chunk = self._inflater.unconsumed_tail
+            entries.extend(self._drain())
+        return entries
+
+    def close(self):
+        if self._head:
+            self._sniffed = True
+            self._parser.feed(self._head)
+            self._head = b''
+        if self._inflater is not None:
+            self._parser.feed(self._inflater.flush())
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        entries = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                    self.kind = _local_name(elem.tag)
+                continue
+            if _local_name(elem.tag) not in ('url', 'sitemap'):
+                continue
+            loc = lastmod = None
+            for child in elem:
+                name = _local_name(child.tag)
+                if name == 'loc':
+                    loc = (child.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = (child.text or '').strip() or None
+            if loc:
+                entries.append((loc, lastmod))
+            # Drop everything parsed so far; the builder keeps its own stack
+            self._root.clear()
+        return entries
+
+
+def parse_sitemap_bytes(data):
+    """Parse a whole sitemap document (plain or gzipped) held in memory"""
+    parser = SitemapStreamParser()
+    entries = parser.feed(data)
+    entries.extend(parser.close())
+    return entries
+
+
+class SitemapState:
+    """
+    What the previous runs saw, so a daily run only touches what changed.
+
+    For every sitemap it keeps the ETag/Last-Modified validators plus the
+    entries it listed (replayed on a 304), and for every model URL the
+    <lastmod> it had when it was last scraped successfully. URLs whose lastmod
+    did not move are skipped, except for a 1/full_refresh_days slice picked by
+    URL hash each day, so everything is still refreshed once per rotation.
+    """
+
+    def __init__(self, path, full_refresh_days=FULL_REFRESH_DAYS):
+        self.path = path
+        self.full_refresh_days = full_refresh_days
+        self.sitemaps = {}
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf8') as f:
+                data = json.load(f)
+            self.sitemaps = data.get('sitemaps', {})
+            self.done = data.get('done', {})
+        self._today = date.today().toordinal()
+
+    def conditional_headers(self, sitemap_url):
+        cached = self.sitemaps.get(sitemap_url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def cached_entries(self, sitemap_url):
+        entries = self.sitemaps.get(sitemap_url, {}).get('entries', {})
+        yield from entries.items()
+
+    def cached_kind(self, sitemap_url):
+        return self.sitemaps.get(sitemap_url, {}).get('kind')
+
+    def start_sitemap(self, sitemap_url):
+        self.sitemaps[sitemap_url] = {'etag': None, 'last_modified': None, 'kind': None, 'entries': {}}
+
+    def finish_sitemap(self, sitemap_url, kind, response_headers):
+        # Validators are only kept once the whole listing was read
+        self.sitemaps[sitemap_url]['kind'] = kind
+        self.sitemaps[sitemap_url]['etag'] = response_headers.get('ETag')
+        self.sitemaps[sitemap_url]['last_modified'] = response_headers.get('Last-Modified')
+
+    def record(self, sitemap_url, loc, lastmod):
+        self.sitemaps[sitemap_url]['entries'][loc] = lastmod
+
+    def is_due(self, loc, lastmod):
+        """New URL, changed (or missing) lastmod, or in today's refresh slice"""
+        if loc not in self.done or lastmod is None or self.done[loc] != lastmod:
+            return True
+        if not self.full_refresh_days:
+            return False
+        return zlib.crc32(loc.encode('utf8')) % self.full_refresh_days == self._today % self.full_refresh_days
+
+    def mark_done(self, loc, lastmod):
+        """
+        Call once a URL was scraped and stored, with the lastmod is_due() saw for it;
+        failures stay due next run
+        """
+        self.done[loc] = lastmod
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf8') as f:
+            json.dump({'sitemaps': self.sitemaps, 'done': self.done}, f)
+
+
+async def _stream_sitemap(session, url, chunk_size=CHUNK_SIZE, state=None):
+    """Yield (kind, loc, lastmod) where kind is 'urlset' or 'sitemapindex'"""
+    headers = state.conditional_headers(url) if state else None
+    async with session.get(url, headers=headers) as response:
+        if state is not None and response.status == 304:
+            print(f"[INFO] Sitemap not modified: {url}")
+            kind = state.cached_kind(url)
+            for loc, lastmod in state.cached_entries(url):
+                yield kind, loc, lastmod
+            return
+        response.raise_for_status()
+        if state is not None:
+            state.start_sitemap(url)
+        parser = SitemapStreamParser()
+        async for chunk in response.content.iter_chunked(chunk_size):
+            for loc, lastmod in parser.feed(chunk):
+                if state is not None:
+                    state.record(url, loc, lastmod)
+                yield parser.kind, loc, lastmod
+        for loc, lastmod in parser.close():
+            if state is not None:
+                state.record(url, loc, lastmod)
+            yield parser.kind, loc, lastmod
+        if state is not None:
+            state.finish_sitemap(url, parser.kind, response.headers)
+
+
+async def iter_sitemap(session, url, chunk_size=CHUNK_SIZE, state=None):
+    """
+    Stream a sitemap and yield (loc, lastmod) pairs as soon as they are parsed.
+    Works for both <urlset> and <sitemapindex> documents. With a SitemapState
+    the request is conditional and a 304 replays the entries stored last time.
+    """
+    async for _, loc, lastmod in _stream_sitemap(session, url, chunk_size, state):
+        yield loc, lastmod
+
+
+async def traverse_sitemaps(session, root_url, include=(), exclude=(),
+                            per_host=SITEMAPS_PER_HOST, state=None, robots=None):
+    """
+    Walk a sitemap tree of any depth and yield the leaf (loc, lastmod) pairs.
+
+    Nested <sitemapindex> documents are followed as they are discovered and
+    fetched concurrently, at most per_host at a time per host. The sitemaps the
+    root lists must match one of the include regexes (when given) and none of
+    the exclude regexes; everything below an accepted sitemap is read whatever
+    its name, and the root is always read. With a RobotsCache, sitemaps that
+    robots.txt disallows are skipped and fetches honour its Crawl-delay.
+    """
+    include = [re.compile(p) for p in include]
+    exclude = [re.compile(p) for p in exclude]
+    leaves = asyncio.Queue(maxsize=LEAF_QUEUE_SIZE)
+    host_limits = HostSlots(per_host, {})
+    seen = {root_url}
+    walkers = set()
+    pending = 0
+    done = object()
+
+    def wanted(url):
+        if include and not any(p.search(url) for p in include):
+            return False
+        return not any(p.search(url) for p in exclude)
+
+    async def walk(url, accepted):
+        nonlocal pending
+        try:
+            async with host_limits(url):
+                print(f"[INFO] Parsing sitemap: {url}")
+                try:
+                    if robots is not None:
+                        await robots.wait(session, url)
+                    async for kind, loc, lastmod in _stream_sitemap(session, url, state=state):
+                        if kind != 'sitemapindex':
+                            await leaves.put((loc, lastmod))
+                        elif loc in seen or not (accepted or wanted(loc)):
+                            continue
+                        elif robots is not None and not await robots.can_fetch(session, loc):
+                            print(f"[INFO] Disallowed by robots.txt: {loc}")
+                        else:
+                            seen.add(loc)
+                            spawn(loc)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError, zlib.error) as e:
+                    print(f"[ERROR] Failed to fetch sitemap {url}: {e}")
+        finally:
+            # Runs however the walk ended, so the consumer always gets its sentinel.
+            # Children were spawned before we got here, so zero means all done
+            pending -= 1
+            if pending == 0:
+                await leaves.put(done)
+
+    def spawn(url, accepted=True):
+        nonlocal pending
+        pending += 1
+        task = asyncio.create_task(walk(url, accepted))
+        walkers.add(task)
+        task.add_done_callback(walkers.discard)
+
+    spawn(root_url, accepted=False)
+    try:
+        while True:
+            item = await leaves.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        for task in list(walkers):
+            task.cancel()
+
+
+# Benchmark: streaming parser vs. the old BeautifulSoup(text, "xml") path
+def build_fixture(count):
+    """Build a synthetic <urlset> the size of a large provider sitemap"""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    for i in range(count):
+        parts.append(
+            f'<url><loc>https://civitai.com/models/{i}/some-model-name-{i}</loc>'
+            f'<lastmod>2025-01-02T19:51:10.344261+00:00</lastmod>'
+            f'<changefreq>daily</changefreq><priority>0.8</priority></url>\n'
+        )
+    parts.append('</urlset>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def _measure(label, func):
+    started = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - started
+    # Second run under tracemalloc, which would skew the timing
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {count:>9} urls  {elapsed:8.3f}s  peak {peak / 1024 / 1024:8.1f} MB")
+
+
+def benchmark(data):
+    def stream_plain():
+        parser = SitemapStreamParser()
+        total = 0
+        for i in range(0, len(data), CHUNK_SIZE):
+            total += len(parser.feed(data[i:i + CHUNK_SIZE]))
+        return total + len(parser.close())
+
+    packed = gzip.compress(data)
+
+    def stream_gzip():
+        parser = SitemapStreamParser()
+        total = 0
+        for i in range(0, len(packed), CHUNK_SIZE):
+            total += len(parser.feed(packed[i:i + CHUNK_SIZE]))
+        return total + len(parser.close())
+
+    print(f"fixture: {len(data) / 1024 / 1024:.1f} MB xml, {len(packed) / 1024 / 1024:.1f} MB gzipped")
+    _measure('iterparse (stream)', stream_plain)
+    _measure('iterparse (stream, gzip)', stream_gzip)
+
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print("bs4 not installed, skipping BeautifulSoup baseline")
+        return
+
+    def soup():
+        text = data.decode('utf-8')
+        return len([loc.text for loc in BeautifulSoup(text, "xml").find_all("loc")])
+
+    _measure('BeautifulSoup(text, "xml")', soup)
+
+
+if __name__ == "__main__":
+    # python sitemap.py [url count | path to saved sitemap]
+    arg = sys.argv[1] if len(sys.argv) > 1 else '200000'
+    if arg.isdigit():
+        benchmark(build_fixture(int(arg)))
+    else:
+        with open(arg, 'rb') as f:
+            benchmark(f.read())
@@ -0,0 +1,127 @@
+import os
+import threading
+from contextlib import contextmanager
+from getbrowser import acquire_browser, release_browser, prepare_tab
+
+# Tabs open at once in one browser, and pages a tab loads before it is replaced
+TAB_POOL_SIZE = int(os.getenv('TAB_POOL_SIZE', 4))
+TAB_RECYCLE_AFTER = int(os.getenv('TAB_RECYCLE_AFTER', 20))
+# Seconds a tab gets to answer the health check before it counts as hung
+HEALTH_TIMEOUT = 5
+
+
+class TabPool:
+    """
+    A fixed set of reusable tabs on one DrissionPage browser.
+
+    Without a `browser` the pool takes a reference on the shared browser from
+    getbrowser when it opens its first tab, and gives it back on close(), so
+    importing a scraper module does not launch Chromium.
+
+    `with pool.tab() as tab:` blocks until a tab is free, so at most `size`
+    tabs exist however many threads are scraping. Each checkout counts as
+    one navigation; a tab that has served `recycle_after` of them is closed
+    and replaced by a fresh one, which keeps renderer memory flat. A tab
+    whose user raised is health checked on return and replaced if it no
+    longer answers.
+    """
+
+    def __init__(self, browser=None, size=TAB_POOL_SIZE, recycle_after=TAB_RECYCLE_AFTER):
+        self.browser = browser
+        self.shared = browser is None
+        self.size = size
+        self.recycle_after = recycle_after
+        self.idle = []
+        self.uses = {}
+        self.created = 0
+        self.lock = threading.Lock()
+        # Signalled whenever a tab goes idle or a slot frees up
+        self.freed = threading.Condition(self.lock)
+        self.stats = {'checkouts': 0, 'recycled': 0, 'replaced': 0}
+
+    def _new_tab(self):
+        with self.lock:
+            if self.browser is None:
+                self.browser = acquire_browser()
+        tab = prepare_tab(self.browser.new_tab())
+        self.uses[tab.tab_id] = 0
+        return tab
+
+    def _discard(self, tab):
+        self.uses.pop(tab.tab_id, None)
+        try:
+            tab.close()
+        except Exception as e:
+            print(f"[WARNING] Could not close tab {tab.tab_id}: {e}")
+
+    def healthy(self, tab):
+        try:
+            return tab.states.is_alive and tab.run_js('return 1;', timeout=HEALTH_TIMEOUT) == 1
+        except Exception:
+            return False
+
+    def _acquire(self):
+        with self.freed:
+            while not self.idle and self.created >= self.size:
+                self.freed.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.created += 1
+        try:
+            return self._new_tab()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _free_slot(self):
+        # A waiter may now open a tab itself, and gets the error if that fails too
+        with self.freed:
+            self.created -= 1
+            self.freed.notify()
+
+    def _put_idle(self, tab):
+        with self.freed:
+            self.idle.append(tab)
+            self.freed.notify()
+
+    @contextmanager
+    def tab(self):
+        tab = self._acquire()
+        self.stats['checkouts'] += 1
+        failed = False
+        try:
+            yield tab
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(tab, failed)
+
+    def _release(self, tab, failed):
+        self.uses[tab.tab_id] = self.uses.get(tab.tab_id, 0) + 1
+        if failed and not self.healthy(tab):
+            self.stats['replaced'] += 1
+        elif self.uses[tab.tab_id] >= self.recycle_after:
+            self.stats['recycled'] += 1
+        else:
+            self._put_idle(tab)
+            return
+        self._discard(tab)
+        try:
+            self._put_idle(self._new_tab())
+        except Exception as e:
+            # Free the slot; the next checkout tries to open the tab again
+            print(f"[ERROR] Could not open a replacement tab: {e}")
+            self._free_slot()
+
+    def close(self):
+        """Close the idle tabs and, for a shared browser, drop this pool's reference"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for tab in idle:
+            self._discard(tab)
+        with self.lock:
+            self.created = 0
+            if self.shared and self.browser is not None:
+                self.browser = None
+                release_browser()
@@ -0,0 +1,73 @@
+import asyncio
+import aiohttp
+from aiohttp import web
+import hfapi
+
+# Repos per page the stand-in server hands out, keyed by the cursor query value
+PAGES = {
+    None: [{'id': 'a/one', 'likes': 5, 'downloads': 50, 'createdAt': '2024-01-01', 'trendingScore': 3, 'extra': 1},
+           {'id': 'b/two', 'likes': 4, 'downloads': 40, 'createdAt': '2024-01-02', 'trendingScore': 2}],
+    '2': [{'id': 'c/three', 'likes': 1, 'downloads': 10, 'createdAt': '2024-01-03', 'trendingScore': 1}],
+}
+
+
+async def run_listing(monkeypatch, func, fail_cursor='never'):
+    """Serve PAGES on a local port, point hfapi at it and run func(session); returns (result, requests)"""
+    seen = []
+
+    async def listing(request):
+        seen.append(request.query)
+        cursor = request.query.get('cursor')
+        if cursor == fail_cursor:
+            return web.Response(status=500)
+        headers = {}
+        if cursor is None:
+            headers['Link'] = f'<{base}/api/models?cursor=2>; rel="next"'
+        return web.json_response(PAGES[cursor], headers=headers)
+
+    app = web.Application()
+    app.router.add_get('/api/models', listing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    base = f'http://{host}:{port}'
+    monkeypatch.setattr(hfapi, 'HF_API_BASE', base)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await func(session), seen
+    finally:
+        await runner.cleanup()
+
+
+async def listed(session, **kwargs):
+    return [item async for item in hfapi.iter_listing(session, 'models', **kwargs)]
+
+
+def test_follows_link_cursor(monkeypatch):
+    items, seen = asyncio.run(run_listing(monkeypatch, lambda s: listed(s, page_size=2)))
+    assert [item['id'] for item in items] == ['a/one', 'b/two', 'c/three']
+    assert items[0]['model_url'] == 'https://huggingface.co/a/one'
+    assert [query.get('cursor') for query in seen] == [None, '2']
+
+
+def test_requests_only_expanded_fields(monkeypatch):
+    items, seen = asyncio.run(run_listing(monkeypatch, lambda s: listed(s, page_size=2)))
+    assert seen[0].getall('expand[]') == hfapi.KINDS['models']['expand']
+    assert seen[0]['limit'] == '2'
+    assert seen[0]['sort'] == 'trendingScore'
+    assert set(items[0]) == set(hfapi.KINDS['models']['expand']) | {'id', 'model_url'}
+    assert items[0]['downloads'] == 50
+
+
+def test_max_items_stops_before_next_page(monkeypatch):
+    items, seen = asyncio.run(run_listing(monkeypatch, lambda s: listed(s, page_size=2, max_items=2)))
+    assert [item['id'] for item in items] == ['a/one', 'b/two']
+    assert len(seen) == 1
+
+
+def test_collect_keeps_items_before_an_error(monkeypatch, capsys):
+    items, _ = asyncio.run(run_listing(monkeypatch, lambda s: hfapi.collect(s, 'models'), fail_cursor='2'))
+    assert list(items) == ['https://huggingface.co/a/one', 'https://huggingface.co/b/two']
+    assert '[ERROR] Hugging Face models listing failed after 2 items' in capsys.readouterr().out
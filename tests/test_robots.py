@@ -0,0 +1,97 @@
+import os
+import asyncio
+import aiohttp
+from aiohttp import web
+from robots import RobotsCache, RobotsRules
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'civitai.robots'), encoding='utf8') as f:
+    CIVITAI_ROBOTS = f.read()
+
+AGENT_GROUPS = """
+User-agent: *
+Disallow: /private
+Crawl-delay: 5
+
+User-agent: monitorbot
+User-agent: otherbot
+Disallow: /models
+Crawl-delay: 1
+"""
+
+
+def test_longer_allow_wins_over_disallow():
+    rules = RobotsRules(CIVITAI_ROBOTS)
+    assert rules.allowed('https://civitai.com/api/trpc/model.getAll?input=1')
+    assert not rules.allowed('https://civitai.com/api/v1/models')
+    assert rules.allowed('https://civitai.com/models/4201/realistic-vision')
+
+
+def test_wildcard_and_end_anchor():
+    rules = RobotsRules(CIVITAI_ROBOTS)
+    assert not rules.allowed('https://civitai.com/models/create')
+    assert not rules.allowed('https://civitai.com/redirect?to=x')
+    assert rules.allowed('https://civitai.com/user/someone')
+
+    rules = RobotsRules("User-agent: *\nDisallow: /*.json$\n")
+    assert not rules.allowed('https://example.com/data/models.json')
+    assert rules.allowed('https://example.com/data/models.json?page=2')
+    assert rules.allowed('https://example.com/data/models.jsonl')
+
+
+def test_most_specific_agent_group():
+    bot = RobotsRules(AGENT_GROUPS, 'MonitorBot/1.0')
+    assert not bot.allowed('https://example.com/models/1')
+    assert bot.allowed('https://example.com/private')
+    assert bot.crawl_delay == 1
+
+    anyone = RobotsRules(AGENT_GROUPS)
+    assert anyone.allowed('https://example.com/models/1')
+    assert not anyone.allowed('https://example.com/private')
+    assert anyone.crawl_delay == 5
+
+
+def test_crawl_delay_and_sitemaps():
+    rules = RobotsRules(CIVITAI_ROBOTS)
+    assert rules.crawl_delay is None
+    assert 'https://civitai.com/sitemap-models.xml' in rules.sitemaps
+
+    cache = RobotsCache()
+    cache.load('https://example.com', "User-agent: *\nCrawl-delay: 0.05\n")
+    assert cache.delay('https://example.com/a') == 0.05
+
+    async def spaced():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(3):
+            await cache.wait(None, 'https://example.com/a')
+        return loop.time() - started
+
+    assert asyncio.run(spaced()) >= 0.1
+
+
+async def fetch_verdicts(status, urls):
+    """can_fetch() for each url against a local host whose robots.txt answers with status"""
+    async def robots_txt(request):
+        return web.Response(status=status, text=CIVITAI_ROBOTS if status == 200 else '')
+
+    app = web.Application()
+    app.router.add_get('/robots.txt', robots_txt)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    try:
+        async with aiohttp.ClientSession() as session:
+            cache = RobotsCache()
+            return [await cache.can_fetch(session, f'http://{host}:{port}{url}') for url in urls]
+    finally:
+        await runner.cleanup()
+
+
+def test_fetch_status_decides_default():
+    urls = ['/models/1', '/api/v1/models']
+    assert asyncio.run(fetch_verdicts(200, urls)) == [True, False]
+    # A missing robots.txt allows everything, a failing one pauses the host
+    assert asyncio.run(fetch_verdicts(404, urls)) == [True, True]
+    assert asyncio.run(fetch_verdicts(503, urls)) == [False, False]
@@ -0,0 +1,67 @@
+import os
+import asyncio
+import aiohttp
+from urllib.parse import urlsplit
+
+try:  # aiohttp decodes br bodies when one of these is installed
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+# Requests in flight to one host, and open connections overall
+PER_HOST_LIMIT = int(os.getenv('PER_HOST_LIMIT', 8))
+TOTAL_CONNECTIONS = int(os.getenv('TOTAL_CONNECTIONS', 100))
+# Hosts that get a budget other than PER_HOST_LIMIT
+HOST_LIMITS = {
+    'api.cloudflare.com': 16,
+}
+# Idle keep-alive connections are reused for this long
+KEEPALIVE_TIMEOUT = 30
+DNS_TTL = 300
+REQUEST_TIMEOUT = 60
+
+
+class HostSlots:
+    """
+    One semaphore per host, created on first use.
+
+    A slow host only holds up the requests queued for that host, not the
+    fetches to every other site and the D1 writes next to them.
+    """
+
+    def __init__(self, default=PER_HOST_LIMIT, overrides=None):
+        self.default = default
+        self.overrides = HOST_LIMITS if overrides is None else overrides
+        self.slots = {}
+
+    def __call__(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.slots:
+            self.slots[host] = asyncio.Semaphore(self.overrides.get(host, self.default))
+        return self.slots[host]
+
+
+# Shared by every scraper in the process
+host_slots = HostSlots()
+
+
+def create_session(**kwargs):
+    """
+    aiohttp session on a pooled connector: per-host connection cap matching
+    host_slots, keep-alive reuse, a TTL DNS cache, and compressed transfer.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=TOTAL_CONNECTIONS,
+        limit_per_host=max([PER_HOST_LIMIT, *HOST_LIMITS.values()]),
+        ttl_dns_cache=DNS_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    headers = {'Accept-Encoding': ACCEPT_ENCODING, **kwargs.pop('headers', {})}
+    kwargs.setdefault('timeout', aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+    return aiohttp.ClientSession(connector=connector, headers=headers, **kwargs)